@@ -0,0 +1,169 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import orjson
+
+
+class LLMCache:
+    """
+    Cache en memoria de respuestas del LLM con TTL y tamaño máximo (LRU).
+    Las claves son hashes SHA256 del request completo (modelo, mensajes, tools...).
+    """
+
+    def __init__(self, max_size: int = 1024, default_ttl: float = 3600):
+        """
+        Inicializa la cache.
+
+        Args:
+            max_size: Máximo de entradas; al superarlo se descarta la menos usada
+            default_ttl: Tiempo de vida por defecto de cada entrada, en segundos
+        """
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(payload: Dict[str, Any], prefix: str = "llm:exact:") -> str:
+        """
+        Genera una clave determinística para un request.
+
+        Args:
+            payload: Parámetros del request (modelo, mensajes, tools, ...)
+            prefix: Prefijo de la clave
+
+        Returns:
+            Clave de cache
+        """
+        serialized = orjson.dumps(payload, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        return prefix + hashlib.sha256(serialized).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Devuelve el valor cacheado, o None si no existe o expiró."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Guarda un valor en la cache."""
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Vacía la cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SemanticCache:
+    """
+    Cache semántica de respuestas del LLM.
+
+    Agrupa las entradas por contexto (todo lo anterior al último mensaje del
+    usuario) y, dentro de un mismo contexto, devuelve la respuesta de un
+    mensaje anterior cuyo embedding sea suficientemente similar
+    (paráfrasis de la misma pregunta).
+    """
+
+    def __init__(self, similarity_threshold: float = 0.92, max_contexts: int = 256,
+                 max_entries_per_context: int = 128, default_ttl: float = 3600):
+        """
+        Inicializa la cache semántica.
+
+        Args:
+            similarity_threshold: Similitud coseno mínima para considerar un hit
+            max_contexts: Máximo de contextos distintos (LRU)
+            max_entries_per_context: Máximo de mensajes cacheados por contexto
+            default_ttl: Tiempo de vida de cada entrada, en segundos
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_contexts = max_contexts
+        self.max_entries_per_context = max_entries_per_context
+        self.default_ttl = default_ttl
+        self._contexts: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop_expired(self, context: Dict[str, Any]):
+        now = time.monotonic()
+        keep = [i for i, expires_at in enumerate(context["expires"]) if expires_at > now]
+        if len(keep) != len(context["expires"]):
+            context["embeddings"] = context["embeddings"][keep]
+            context["values"] = [context["values"][i] for i in keep]
+            context["expires"] = [context["expires"][i] for i in keep]
+
+    def get(self, context_key: str, embedding: List[float]) -> Optional[Any]:
+        """
+        Busca una respuesta cacheada para un mensaje similar en el mismo contexto.
+
+        Args:
+            context_key: Clave del contexto (ver LLMCache.make_key)
+            embedding: Embedding del mensaje del usuario
+
+        Returns:
+            Valor cacheado o None si no hay ninguno suficientemente similar
+        """
+        with self._lock:
+            context = self._contexts.get(context_key)
+            if context is None:
+                return None
+
+            self._drop_expired(context)
+            if not context["values"]:
+                del self._contexts[context_key]
+                return None
+
+            self._contexts.move_to_end(context_key)
+
+            # Producto punto vectorizado contra todos los embeddings del contexto
+            scores = context["embeddings"] @ self._normalize(embedding)
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity_threshold:
+                return context["values"][best]
+            return None
+
+    def set(self, context_key: str, embedding: List[float], value: Any, ttl: Optional[float] = None):
+        """Guarda la respuesta de un mensaje en su contexto."""
+        ttl = self.default_ttl if ttl is None else ttl
+        vector = self._normalize(embedding)
+
+        with self._lock:
+            context = self._contexts.get(context_key)
+            if context is None:
+                context = {"embeddings": np.empty((0, vector.shape[0]), dtype=np.float32), "values": [], "expires": []}
+                self._contexts[context_key] = context
+
+            context["embeddings"] = np.vstack([context["embeddings"], vector])[-self.max_entries_per_context:]
+            context["values"] = (context["values"] + [value])[-self.max_entries_per_context:]
+            context["expires"] = (context["expires"] + [time.monotonic() + ttl])[-self.max_entries_per_context:]
+
+            self._contexts.move_to_end(context_key)
+            while len(self._contexts) > self.max_contexts:
+                self._contexts.popitem(last=False)
+
+    def clear(self):
+        """Vacía la cache."""
+        with self._lock:
+            self._contexts.clear()
@@ -1,9 +1,140 @@
 import os
-import json
-import requests
-from typing import List, Dict, Any, Optional, Callable
-from openai import OpenAI
+import logging
+import re
+import threading
+import time
+import uuid
+import asyncio
+import functools
+import fastjsonschema
+import httpx
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Tuple, NamedTuple
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+from openai.types.chat import ChatCompletion, ChatCompletionMessageToolCall
 from .notion_adapter import NotionAdapter
+from .llm_cache import LLMCache, SemanticCache
+from .openai_adapter_v2 import _run_sync
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken llega con langchain-openai; sin él se estima por caracteres
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+
+# Pool de conexiones keep-alive para OpenAI (HTTP/2 multiplexa los requests concurrentes)
+OPENAI_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0)
+
+GITHUB_API_URL = "https://api.github.com"
+GITHUB_TIMEOUT = 10.0
+GITHUB_MAX_RETRIES = 3
+GITHUB_RETRY_STATUSES = frozenset({502, 503, 504})
+
+# Métodos del NotionAdapter para las tools de Notion que reciben un único ID
+NOTION_SINGLE_ARG_METHODS = {
+    "read_notion_page": "read_page",
+    "get_notion_page_blocks": "get_page_blocks",
+    "delete_notion_block": "delete_block",
+}
+
+# Tools sin efectos secundarios: sus respuestas se cachean por unos segundos
+READ_ONLY_TOOLS = frozenset({
+    "search_notion_pages", "read_notion_page", "get_notion_page_blocks",
+    "github_search_repositories", "github_get_repository", "github_list_issues",
+})
+READ_ONLY_CACHE_TTL_SECONDS = 60
+
+# Tools de lectura de GitHub que se pueden agrupar en una sola consulta GraphQL
+GITHUB_GRAPHQL_TOOLS = frozenset({"github_search_repositories", "github_get_repository", "github_list_issues"})
+
+# Campos GraphQL con alias al estilo de la API REST, para que el modelo vea la misma forma
+GITHUB_REPOSITORY_FIELDS = (
+    "name full_name: nameWithOwner description html_url: url "
+    "stargazers_count: stargazerCount forks_count: forkCount "
+    "language: primaryLanguage { name } default_branch: defaultBranchRef { name } "
+    "private: isPrivate created_at: createdAt updated_at: updatedAt"
+)
+# Las búsquedas solo piden los campos que usa el modelo (sin metadata extra)
+GITHUB_SEARCH_REPOSITORY_FIELDS = (
+    "full_name: nameWithOwner description html_url: url stargazers_count: stargazerCount "
+    "language: primaryLanguage { name } updated_at: updatedAt"
+)
+GITHUB_ISSUE_FIELDS = (
+    "number title body state html_url: url updated_at: updatedAt "
+    "user: author { login } labels(first: 20) { nodes { name } }"
+)
+GITHUB_ISSUE_STATES = {"open": ["OPEN"], "closed": ["CLOSED"], "all": ["OPEN", "CLOSED"]}
+
+
+def _flatten_github_repository(repository: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aplana los objetos anidados de GraphQL (primaryLanguage / defaultBranchRef
+    vienen como {name: ...}) a los strings que devuelve la API REST.
+    """
+    for key in ("language", "default_branch"):
+        if key in repository:
+            repository[key] = (repository[key] or {}).get("name")
+    return repository
+
+
+def _flatten_github_issue(issue: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aplana la conexión de labels de GraphQL ({nodes: [...]}) a la lista
+    de labels que devuelve la API REST, y pasa el state (OPEN / CLOSED en
+    GraphQL) a minúsculas como en REST.
+    """
+    issue["labels"] = (issue.get("labels") or {}).get("nodes", [])
+    if issue.get("state"):
+        issue["state"] = issue["state"].lower()
+    return issue
+
+# Máximo de blocks que acepta la API de Notion en un solo append de children
+NOTION_APPEND_BATCH_SIZE = 100
+
+# Tools de Notion que se fusionan cuando el modelo las repite sobre la misma página/parent
+# en un turno: nombre -> (parámetro que identifica el destino, lista a concatenar, tamaño de tanda)
+FUSIBLE_NOTION_TOOLS = {
+    "append_notion_blocks": ("parent_id", "blocks", NOTION_APPEND_BATCH_SIZE),
+    "cleanup_notion_duplicate_blocks": ("page_id", "block_ids", None),
+    "reorganize_notion_blocks": ("page_id", "operations", None),
+}
+
+# Largo máximo (en caracteres) de la salida de una tool guardada en el historial
+MAX_TOOL_OUTPUT_CHARS = 2048
+
+# Máximo de elementos por lista (p.ej. "blocks") en las salidas de tools guardadas en el historial
+MAX_TOOL_RESULT_ITEMS = 50
+
+# Verbos que indican que el pedido del usuario requiere usar tools
+REQUIRE_TOOLS_RE = re.compile(r"\b(?:buscar?|crear?|actualizar?|leer?)\b", re.IGNORECASE)
+
+# Requests diferidos a la Batch API de OpenAI (ver OpenAIAdapter.flush_batch)
+BATCH_DIR = "batches"
+BATCH_PENDING_FILE = os.path.join(BATCH_DIR, "pending.jsonl")
+BATCH_TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+_batch_file_lock = threading.Lock()
+
+# Instrucción que se agrega al final de cada consulta de seguimiento
+FOLLOW_UP_NUDGE = {
+    "role": "system",
+    "content": "Si necesitas ejecutar más herramientas para completar la tarea, hazlo ahora. Si ya tienes suficiente información, proporciona la respuesta final."
+}
+
+
+class ToolResult(NamedTuple):
+    """Resultado de un tool call. Registro liviano respaldado por una tupla."""
+
+    tool_call_id: str
+    function_name: str
+    result: Any
+    success: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convierte el resultado a dict, para devolverlo fuera del adaptador."""
+        return self._asdict()
 
 
 class OpenAIAdapter:
@@ -12,7 +143,19 @@ class OpenAIAdapter:
     Permite ejecutar herramientas externas y mantener conversaciones con contexto.
     """
 
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-5-mini"):
+    __slots__ = (
+        "api_key", "model", "client", "response_cache", "semantic_cache", "embedding_model",
+        "max_history_tokens", "keep_recent_turns", "summary_model", "_encoding",
+        "_http", "_http_loop", "_async_client", "_async_client_loop", "_chat_create",
+        "notion_adapter", "github_token", "_gh_headers", "_gh_json_headers", "_tool_pool", "tools", "conversation_history",
+        "_pending_batch_ids",
+        "notion_tools_definitions", "github_tools_definitions", "_tool_dispatch", "_known_tools", "_single_arg_dispatch",
+        "_tools_payload", "_tools_payload_json", "_validators", "_ro_cache",
+    )
+
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-5-mini", response_cache: Optional[LLMCache] = None,
+                 semantic_cache: Optional[SemanticCache] = None, embedding_model: str = "text-embedding-3-small",
+                 max_history_tokens: int = 8000, keep_recent_turns: int = 3, summary_model: str = "gpt-4o-mini"):
         """
         Inicializa el adaptador de OpenAI.
 
@@ -20,19 +163,52 @@ class OpenAIAdapter:
             api_key: Token de API de OpenAI. Si no se proporciona,
                     se busca en la variable de entorno OPENAI_API_KEY
             model: Modelo de OpenAI a utilizar
+            response_cache: Cache de respuestas exactas (opcional, desactivada por defecto)
+            semantic_cache: Cache semántica para paráfrasis en llamadas sin tools (opcional)
+            embedding_model: Modelo de embeddings usado por la cache semántica
+            max_history_tokens: Tokens a partir de los cuales se compacta el historial
+            keep_recent_turns: Turnos recientes que se conservan textuales al compactar
+            summary_model: Modelo usado para resumir los turnos antiguos
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("Se requiere un token de API de OpenAI. Configure OPENAI_API_KEY en las variables de entorno.")
 
         self.model = model
-        self.client = OpenAI(api_key=self.api_key)
+        self.response_cache = response_cache
+        self.semantic_cache = semantic_cache
+        self.embedding_model = embedding_model
+        self.max_history_tokens = max_history_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.summary_model = summary_model
+        self._encoding = self._get_encoding(model)
+        self.client = OpenAI(
+            api_key=self.api_key,
+            http_client=DefaultHttpxClient(http2=True, limits=OPENAI_HTTP_LIMITS)
+        )
+        self._http = None
+        self._http_loop = None
+        self._async_client = None
+        self._async_client_loop = None
+        self._chat_create = None
         self.notion_adapter = None
+        self._tool_pool = ThreadPoolExecutor(max_workers=8)
         self.tools = {}
         self.conversation_history = []
+        self._pending_batch_ids = set()
+        self._gh_headers = None
+        self._gh_json_headers = None
+        self.github_token = None
+        self.github_tools_definitions = []
+        self._validators = {}
+        self._ro_cache = LLMCache(max_size=1024, default_ttl=READ_ONLY_CACHE_TTL_SECONDS)
 
         # Inicializar tools disponibles
         self._initialize_tools()
+        self._tool_dispatch = self._build_tool_dispatch()
+        self._known_tools = frozenset(self._tool_dispatch)
+        self._single_arg_dispatch = self._build_single_arg_dispatch()
+        self._refresh_tools_payload()
 
     def set_notion_adapter(self, notion_adapter: NotionAdapter):
         """
@@ -42,6 +218,7 @@ class OpenAIAdapter:
             notion_adapter: Instancia del NotionAdapter
         """
         self.notion_adapter = notion_adapter
+        self._refresh_tools_payload()
 
     def add_github_mcp_tool(self, github_token: Optional[str] = None):
         """
@@ -53,251 +230,549 @@ class OpenAIAdapter:
         """
         self.github_token = github_token or os.getenv('GITHUB_TOKEN')
         if self.github_token:
+            self._gh_headers = {
+                "Authorization": f"token {self.github_token}",
+                "Accept": "application/vnd.github.v3+json"
+            }
+            self._gh_json_headers = {**self._gh_headers, "Content-Type": "application/json"}
             self._register_github_tools()
+            self._refresh_tools_payload()
 
-    def chat(self, message: str, system_prompt: Optional[str] = None) -> Dict[str, Any]:
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """
+        Sesión HTTP asíncrona compartida por el cliente de OpenAI y las tools.
+
+        Su pool de conexiones queda ligado al event loop en el que se crea,
+        así que se crea una por loop. Los wrappers síncronos corren todos en el
+        loop de fondo compartido (ver _run_sync), así que reutilizan la misma.
+        """
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http_loop is not loop:
+            self._http = DefaultAsyncHttpxClient(http2=True, limits=OPENAI_HTTP_LIMITS)
+            self._http_loop = loop
+        return self._http
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Cliente asíncrono de OpenAI sobre la sesión HTTP compartida."""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = AsyncOpenAI(api_key=self.api_key, http_client=self.http)
+            self._async_client_loop = loop
+            # El modelo es fijo por instancia: se bindea una vez por cliente
+            self._chat_create = functools.partial(self._async_client.chat.completions.create, model=self.model)
+        return self._async_client
+
+    @property
+    def chat_create(self) -> Callable:
+        """chat.completions.create del cliente del loop actual, con el modelo ya fijado."""
+        self.async_client  # Crea el cliente (y el partial) del loop actual si hace falta
+        return self._chat_create
+
+    async def aclose(self):
+        """Cierra la sesión HTTP compartida del event loop actual."""
+        if self._http is not None and self._http_loop is asyncio.get_running_loop():
+            await self._http.aclose()
+        self._http = None
+        self._http_loop = None
+        self._async_client = None
+        self._async_client_loop = None
+        self._chat_create = None
+
+    def chat(self, message: str, system_prompt: Optional[str] = None, batch_mode: bool = False) -> Dict[str, Any]:
         """
         Envía un mensaje al modelo y ejecuta tools si es necesario.
+        Wrapper síncrono de achat() para compatibilidad.
+
+        Args:
+            message: Mensaje del usuario
+            system_prompt: Prompt del sistema (opcional)
+            batch_mode: Diferir la respuesta final a la Batch API (ver achat)
+
+        Returns:
+            Respuesta del modelo con posibles resultados de tools
+        """
+        # Corre en el loop de fondo de larga vida: funciona aunque el hilo ya tenga
+        # un loop corriendo y la sesión HTTP/2 se reutiliza entre llamadas
+        return _run_sync(lambda: self.achat(message, system_prompt, batch_mode))
+
+    async def achat(self, message: str, system_prompt: Optional[str] = None, batch_mode: bool = False) -> Dict[str, Any]:
+        """
+        Envía un mensaje al modelo y ejecuta tools si es necesario, sin bloquear el event loop.
 
         Args:
             message: Mensaje del usuario
             system_prompt: Prompt del sistema (opcional)
+            batch_mode: Para procesos en segundo plano: la respuesta final después
+                        de ejecutar tools no se pide en el momento sino que se encola
+                        en BATCH_PENDING_FILE para la Batch API (50% más barata, SLA de 24h).
+                        El resultado incluye "batch_request_id" en lugar de "response";
+                        la respuesta se recoge con collect_batch_results().
 
         Returns:
             Respuesta del modelo con posibles resultados de tools
         """
-        print("🤖 OpenAIAdapter.chat() - Iniciando conversación")
-        print(f"📝 Message: {message}")
-        print(f"🤖 System prompt: {system_prompt}")
-        print(f"💬 Historial actual: {len(self.conversation_history)} mensajes")
+        logger.debug("🤖 OpenAIAdapter.chat() - Iniciando conversación")
+        logger.debug("📝 Message: %s", message)
+        logger.debug("🤖 System prompt: %s", system_prompt)
+        logger.debug("💬 Historial actual: %d mensajes", len(self.conversation_history))
 
         try:
+            # Mantener acotado el historial que se reenvía en cada llamada
+            await self._compact_history()
+
             # Preparar mensajes
-            print("📦 Preparando mensajes para OpenAI...")
-            messages = []
+            logger.debug("📦 Preparando mensajes para OpenAI...")
+            # Prefijo estático: se mantiene idéntico en todas las llamadas para
+            # aprovechar el prefix cache de OpenAI. Las instrucciones dinámicas van al final.
+            system_messages = []
             if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-                print("✅ System prompt agregado")
+                system_messages.append({"role": "system", "content": system_prompt})
+                logger.debug("✅ System prompt agregado")
+
+            messages = list(system_messages)
 
             # Agregar historial de conversación
             messages.extend(self.conversation_history)
             messages.append({"role": "user", "content": message})
-            print(f"📨 Total mensajes enviados: {len(messages)}")
+            logger.debug("📨 Total mensajes enviados: %d", len(messages))
 
             # Obtener tools disponibles
-            print("🔧 Obteniendo tools disponibles...")
+            logger.debug("🔧 Obteniendo tools disponibles...")
             available_tools = self._get_available_tools()
-            print(f"🛠️ Tools disponibles: {len(available_tools)}")
+            logger.debug("🛠️ Tools disponibles: %d", len(available_tools))
 
-            if available_tools:
-                print("📋 Lista de tools:")
+            if available_tools and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("📋 Lista de tools:")
                 for i, tool in enumerate(available_tools):
-                    print(f"  {i+1}. {tool.get('function', {}).get('name', 'unknown')}")
+                    logger.debug("  %d. %s", i + 1, tool.get('function', {}).get('name', 'unknown'))
 
             # Primera llamada al modelo
-            print("🚀 Enviando primera petición a OpenAI...")
-            print(f"🤖 Modelo: {self.model}")
-            print(f"🛠️ Tools incluidos: {len(available_tools) if available_tools else 0}")
+            logger.debug("🚀 Enviando primera petición a OpenAI (modelo %s, %d tools)", self.model, len(available_tools) if available_tools else 0)
+
+            # Si el pedido claramente requiere tools se fuerza su uso desde la primera
+            # llamada, en lugar de reintentar cuando el modelo solo explica lo que haría
+            require_tools = bool(available_tools) and REQUIRE_TOOLS_RE.search(message) is not None
 
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = await self._create_completion(
                 messages=messages,
                 tools=available_tools if available_tools else None,
-                tool_choice="auto"
+                tool_choice="required" if require_tools else "auto"
             )
 
-            print("✅ Respuesta inicial de OpenAI recibida")
             response_message = response.choices[0].message
-            print(f"📥 Content: {response_message.content[:200] if response_message.content else 'None'}...")
+            logger.debug("📥 Respuesta inicial de OpenAI: %.200s", response_message.content)
 
             # Verificar si hay tool_calls
             has_tool_calls = hasattr(response_message, 'tool_calls') and response_message.tool_calls
-            print(f"🔧 Tool calls detectados: {len(response_message.tool_calls) if has_tool_calls else 0}")
-
-            # Detectar si el modelo está explicando en lugar de usar tools
-            content = response_message.content or ""
-            is_explaining_instead_of_using_tools = (
-                not has_tool_calls and
-                any(keyword in content.lower() for keyword in [
-                    "voy a", "procedo a", "ahora voy a", "primero", "luego",
-                    "después", "a continuación", "siguiente paso", "aplicaré"
-                ]) and
-                available_tools  # Solo si hay tools disponibles
-            )
-
-            if is_explaining_instead_of_using_tools:
-                print("⚠️ Modelo está explicando en lugar de usar tools - forzando segunda iteración")
-                print(f"📝 Contenido explicativo detectado: {content[:100]}...")
-
-                # Agregar al historial como respuesta del assistant
-                self.conversation_history.append({"role": "user", "content": message})
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": response_message.content,
-                    "tool_calls": getattr(response_message, 'tool_calls', None)
-                })
-
-                # Forzar una segunda llamada pidiendo específicamente usar tools
-                print("🔄 Forzando segunda iteración con instrucciones claras...")
-                follow_up_message = f"{message}\n\nPor favor, ejecuta las herramientas necesarias para completar esta tarea. No expliques, solo usa las tools disponibles."
-
-                # Crear nueva conversación para la segunda iteración
-                follow_up_messages = [
-                    {"role": "system", "content": system_prompt + "\n\nIMPORTANTE: Usa las herramientas directamente, no expliques lo que vas a hacer."},
-                    {"role": "user", "content": follow_up_message}
-                ]
-
-                follow_up_response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=follow_up_messages,
-                    tools=available_tools,
-                    tool_choice="auto"
-                )
-
-                follow_up_message_response = follow_up_response.choices[0].message
-                follow_up_has_tools = hasattr(follow_up_message_response, 'tool_calls') and follow_up_message_response.tool_calls
-
-                print(f"🔧 Tool calls en segunda iteración: {len(follow_up_message_response.tool_calls) if follow_up_has_tools else 0}")
-
-                # Reemplazar la respuesta original con la de follow-up
-                response_message = follow_up_message_response
-                has_tool_calls = follow_up_has_tools
+            logger.debug("🔧 Tool calls detectados: %d", len(response_message.tool_calls) if has_tool_calls else 0)
 
             # Agregar respuesta al historial
-            print("📝 Actualizando historial de conversación...")
             self.conversation_history.append({"role": "user", "content": message})
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": response_message.content,
-                "tool_calls": getattr(response_message, 'tool_calls', None)
-            })
-            print(f"💬 Historial actualizado: {len(self.conversation_history)} mensajes")
+            self.conversation_history.append(
+                self._assistant_message(response_message.content, response_message.tool_calls)
+            )
+            logger.debug("💬 Historial actualizado: %d mensajes", len(self.conversation_history))
 
             # Ejecutar tools si fueron llamadas
             all_tool_results = []
             if has_tool_calls:
-                print("⚙️ Ejecutando tools llamadas por OpenAI...")
-                tool_results = self._execute_tools(response_message.tool_calls)
+                logger.debug("⚙️ Ejecutando tools llamadas por OpenAI...")
+                tool_results = await self._execute_tools_async(response_message.tool_calls)
                 all_tool_results.extend(tool_results)
-                print(f"✅ Primera tanda de tools ejecutadas: {len(tool_results)}")
+                logger.debug("✅ Primera tanda de tools ejecutadas: %d", len(tool_results))
 
                 # Log detallado de cada tool result
-                for i, result in enumerate(tool_results):
-                    status = "✅" if result.get("success") else "❌"
-                    print(f"🔧 Tool {i+1}: {result.get('function_name')} - {status}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    for i, result in enumerate(tool_results):
+                        status = "✅" if result.success else "❌"
+                        logger.debug("🔧 Tool %d: %s - %s", i + 1, result.function_name, status)
 
                 # Agregar resultados al historial
-                print("📝 Agregando resultados de tools al historial...")
                 for result in tool_results:
                     self.conversation_history.append({
                         "role": "tool",
-                        "tool_call_id": result["tool_call_id"],
-                        "content": json.dumps(result["result"])
+                        "tool_call_id": result.tool_call_id,
+                        "content": self._tool_message_content(result.result)
                     })
 
-                # Verificar si necesitamos más iteraciones
-                max_iterations = 5  # Máximo de iteraciones para evitar loops infinitos
+                # Seguir mientras el modelo pida más tools, con un tope de tool calls totales
+                max_tool_calls = 25
+                total_tool_calls = len(tool_results)
+                final_message = None
                 iteration = 1
 
-                while iteration < max_iterations:
-                    print(f"🔄 Iteración {iteration + 1}: Verificando si se necesitan más tools...")
+                while total_tool_calls < max_tool_calls:
+                    logger.debug("🔄 Iteración %d: Verificando si se necesitan más tools...", iteration + 1)
 
                     # Enviar consulta de seguimiento para ver si el modelo necesita más tools
-                    follow_up_messages = self.conversation_history.copy()
-                    follow_up_messages.append({
-                        "role": "system",
-                        "content": "Si necesitas ejecutar más herramientas para completar la tarea, hazlo ahora. Si ya tienes suficiente información, proporciona la respuesta final."
-                    })
+                    follow_up_messages = [*system_messages, *self.conversation_history, FOLLOW_UP_NUDGE]
 
-                    follow_up_response = self.client.chat.completions.create(
-                        model=self.model,
-                        messages=follow_up_messages,
-                        tools=available_tools,
-                        tool_choice="auto"
+                    # Streaming: cada tool arranca apenas sus argumentos están completos
+                    follow_up_content, follow_up_tool_calls, additional_results = await self._stream_completion_with_tools(
+                        follow_up_messages, available_tools
                     )
 
-                    follow_up_message = follow_up_response.choices[0].message
-                    follow_up_has_tools = hasattr(follow_up_message, 'tool_calls') and follow_up_message.tool_calls
-
-                    if not follow_up_has_tools:
-                        print(f"✅ No se necesitan más tools después de iteración {iteration}")
-                        final_message = follow_up_message.content
+                    if not follow_up_tool_calls:
+                        logger.debug("✅ No se necesitan más tools después de iteración %d", iteration)
+                        final_message = follow_up_content
                         break
 
-                    print(f"🔄 Iteración {iteration + 1}: Ejecutando {len(follow_up_message.tool_calls)} tools adicionales")
-
-                    # Ejecutar tools adicionales
-                    additional_results = self._execute_tools(follow_up_message.tool_calls)
+                    logger.debug("🔄 Iteración %d: Ejecutadas %d tools adicionales", iteration + 1, len(follow_up_tool_calls))
                     all_tool_results.extend(additional_results)
+                    total_tool_calls += len(follow_up_tool_calls)
 
                     # Agregar al historial
-                    self.conversation_history.append({
-                        "role": "assistant",
-                        "content": follow_up_message.content,
-                        "tool_calls": follow_up_message.tool_calls
-                    })
+                    self.conversation_history.append(self._assistant_message(follow_up_content, follow_up_tool_calls))
 
                     for result in additional_results:
                         self.conversation_history.append({
                             "role": "tool",
-                            "tool_call_id": result["tool_call_id"],
-                            "content": json.dumps(result["result"])
+                            "tool_call_id": result.tool_call_id,
+                            "content": self._tool_message_content(result.result)
                         })
 
                     iteration += 1
 
                 # Respuesta final
-                if iteration >= max_iterations:
-                    print(f"⚠️ Se alcanzó el máximo de iteraciones ({max_iterations})")
+                if total_tool_calls >= max_tool_calls:
+                    logger.warning("⚠️ Se alcanzó el máximo de tool calls (%d)", max_tool_calls)
+
+                # En batch_mode la respuesta final se encola para la Batch API
+                if final_message is None and batch_mode:
+                    batch_request_id = self._enqueue_batch_request(system_messages + self.conversation_history)
+                    logger.info("📦 Respuesta final encolada para la Batch API: %s", batch_request_id)
+                    return {
+                        "response": None,
+                        "batch_request_id": batch_request_id,
+                        "tool_results": [result.to_dict() for result in all_tool_results],
+                        "conversation_history": self.conversation_history
+                    }
 
                 # Si no tenemos una respuesta final, obtenerla
-                if 'final_message' not in locals():
-                    print("🚀 Obteniendo respuesta final...")
-                    final_response = self.client.chat.completions.create(
-                        model=self.model,
-                        messages=self.conversation_history
+                if final_message is None:
+                    logger.debug("🚀 Obteniendo respuesta final...")
+                    final_response = await self._create_completion(
+                        messages=system_messages + self.conversation_history
                     )
                     final_message = final_response.choices[0].message.content
 
-                print("✅ Respuesta final de OpenAI recibida")
-                print(f"📥 Final response: {final_message[:200] if final_message else 'None'}...")
+                logger.debug("📥 Respuesta final de OpenAI: %.200s", final_message)
 
                 # Actualizar historial
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": final_message
-                })
+                self.conversation_history.append(self._assistant_message(final_message))
 
                 result_data = {
                     "response": final_message,
-                    "tool_results": all_tool_results,
-                    "conversation_history": self.conversation_history.copy()
+                    "tool_results": [result.to_dict() for result in all_tool_results],
+                    "conversation_history": self.conversation_history
                 }
 
-                print(f"🎉 Conversación con tools completada: {len(all_tool_results)} tools totales")
+                logger.info("🎉 Conversación con tools completada: %d tools totales", len(all_tool_results))
                 return result_data
 
             # Respuesta sin tools
-            print("💬 Respuesta sin tools - conversación completada")
+            logger.debug("💬 Respuesta sin tools - conversación completada")
             result_data = {
                 "response": response_message.content,
-                "tool_results": all_tool_results,
-                "conversation_history": self.conversation_history.copy()
+                "tool_results": [result.to_dict() for result in all_tool_results],
+                "conversation_history": self.conversation_history
             }
 
             return result_data
 
         except Exception as e:
-            print(f"❌ Error en conversación: {e}")
-            print("Stack trace completo:")
+            logger.exception("❌ Error en conversación: %s", e)
             error_msg = f"Error en la conversación: {str(e)}"
             return {
                 "response": error_msg,
-                "tool_results": all_tool_results if 'all_tool_results' in locals() else [],
-                "conversation_history": self.conversation_history.copy(),
+                "tool_results": [result.to_dict() for result in all_tool_results] if 'all_tool_results' in locals() else [],
+                "conversation_history": self.conversation_history,
                 "error": True
             }
 
+    async def _create_completion(self, **kwargs) -> ChatCompletion:
+        """
+        Llama a chat.completions.create pasando por la cache de respuestas exactas.
+
+        Solo se cachean respuestas finales (sin tool_calls) de requests
+        deterministas (sin temperature o con temperature=0). Si hay cache
+        semántica, las llamadas sin tools también se buscan por similitud del
+        último mensaje del usuario dentro del mismo contexto.
+        """
+        cacheable = self.response_cache is not None and kwargs.get("temperature", 0) == 0
+        cache_key = None
+
+        if cacheable:
+            tools = kwargs.get("tools")
+            cache_key = LLMCache.make_key({
+                "model": self.model,
+                "messages": kwargs.get("messages"),
+                # La lista memoizada ya tiene su JSON calculado: no se re-serializa
+                "tools": self._tools_payload_json if tools is not None and tools is self._tools_payload else tools,
+                "tool_choice": kwargs.get("tool_choice"),
+            })
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("⚡ Respuesta obtenida de cache")
+                return ChatCompletion.model_validate(cached)
+
+        # Cache semántica: solo para llamadas sin tools que terminan en un mensaje del usuario
+        messages = kwargs.get("messages") or []
+        semantic_key = None
+        embedding = None
+        if (self.semantic_cache is not None and kwargs.get("temperature", 0) == 0
+                and not kwargs.get("tools") and messages and messages[-1].get("role") == "user"):
+            semantic_key = LLMCache.make_key(
+                {"model": self.model, "messages": messages[:-1]},
+                prefix="llm:semantic:"
+            )
+            try:
+                embedding = await self._embed(messages[-1]["content"])
+                cached = self.semantic_cache.get(semantic_key, embedding)
+            except Exception as e:
+                # La cache es una optimización: si falla cuenta como miss y se sigue con el modelo
+                logger.warning("⚠️ Cache semántica no disponible: %s", e)
+                semantic_key = None
+                cached = None
+            if cached is not None:
+                logger.debug("⚡ Respuesta obtenida de cache semántica")
+                return ChatCompletion.model_validate(cached)
+
+        response = await self.chat_create(**kwargs)
+
+        if response.choices and not response.choices[0].message.tool_calls:
+            if cacheable:
+                self.response_cache.set(cache_key, response.model_dump())
+            if semantic_key is not None:
+                self.semantic_cache.set(semantic_key, embedding, response.model_dump())
+
+        return response
+
+    def _enqueue_batch_request(self, messages: List[Dict[str, Any]]) -> str:
+        """
+        Agrega un request de chat completion a BATCH_PENDING_FILE.
+
+        Args:
+            messages: Mensajes del request
+
+        Returns:
+            custom_id del request, para ubicar su respuesta en el output del batch
+        """
+        custom_id = f"chat-{uuid.uuid4().hex}"
+        line = orjson.dumps(
+            {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": self.model, "messages": messages}
+            },
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        )
+
+        with _batch_file_lock:
+            os.makedirs(BATCH_DIR, exist_ok=True)
+            with open(BATCH_PENDING_FILE, "ab") as f:
+                f.write(line)
+
+        self._pending_batch_ids.add(custom_id)
+        return custom_id
+
+    def flush_batch(self) -> Optional[Dict[str, Any]]:
+        """
+        Sube los requests encolados en BATCH_PENDING_FILE y crea un batch en OpenAI.
+        Las respuestas se recogen luego con collect_batch_results(batch["id"]).
+
+        Returns:
+            Datos del batch creado, o None si no había requests pendientes
+        """
+        with _batch_file_lock:
+            if not os.path.exists(BATCH_PENDING_FILE) or os.path.getsize(BATCH_PENDING_FILE) == 0:
+                return None
+            # Renombrar primero: los requests nuevos van a un pending.jsonl limpio
+            batch_path = os.path.join(BATCH_DIR, f"batch-{int(time.time())}-{uuid.uuid4().hex[:8]}.jsonl")
+            os.replace(BATCH_PENDING_FILE, batch_path)
+
+        with open(batch_path, "rb") as f:
+            batch_file = self.client.files.create(file=f, purpose="batch")
+
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info("📦 Batch creado: %s (%s)", batch.id, batch_path)
+        return batch.model_dump()
+
+    def collect_batch_results(self, batch_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Descarga el output de un batch creado con flush_batch() y agrega al
+        conversation_history la respuesta final de los requests que encoló
+        esta instancia (el archivo de pendientes es compartido, así que el
+        batch puede traer respuestas de otras).
+
+        Args:
+            batch_id: ID del batch (batch["id"] de flush_batch)
+
+        Returns:
+            custom_id -> {"response": texto} o {"error": detalle},
+            o None si el batch todavía no terminó
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status not in BATCH_TERMINAL_STATUSES:
+            logger.debug("⏳ Batch %s: %s", batch_id, batch.status)
+            return None
+
+        # Un batch expirado o cancelado puede tener output parcial
+        output = b""
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                output += self.client.files.content(file_id).content
+
+        results = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            try:
+                item = orjson.loads(line)
+                custom_id = item["custom_id"]
+                response = item.get("response") or {}
+                body = response.get("body") or {}
+                if response.get("status_code") != 200 or item.get("error"):
+                    error = item.get("error") or body.get("error") or {}
+                    results[custom_id] = {"error": error.get("message", "Error desconocido")}
+                else:
+                    results[custom_id] = {"response": body["choices"][0]["message"]["content"]}
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                # Una línea ilegible solo invalida su propio request, no el batch entero
+                logger.error("❌ Línea de output de batch %s ilegible: %s", batch_id, e)
+                continue
+
+            if custom_id in self._pending_batch_ids and "response" in results[custom_id]:
+                self._pending_batch_ids.discard(custom_id)
+                self.conversation_history.append(self._assistant_message(results[custom_id]["response"]))
+
+        logger.info("📦 Batch %s (%s): %d respuestas recogidas", batch_id, batch.status, len(results))
+        return results
+
+    async def _embed(self, text: str) -> List[float]:
+        """Obtiene el embedding de un texto para la cache semántica."""
+        response = await self.async_client.embeddings.create(model=self.embedding_model, input=text)
+        return response.data[0].embedding
+
+    @staticmethod
+    def _assistant_message(content: Optional[str], tool_calls=None) -> Dict[str, Any]:
+        """
+        Arma el mensaje del assistant para el historial con dicts planos: los
+        tool_calls del SDK (modelos pydantic) se convierten una sola vez y la
+        clave tool_calls solo se incluye si hay llamadas.
+
+        Args:
+            content: Texto de la respuesta
+            tool_calls: Tool calls de la respuesta (modelos del SDK o dicts)
+
+        Returns:
+            Mensaje listo para reenviar a la API
+        """
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = [
+                call if isinstance(call, dict) else {
+                    "id": call.id,
+                    "type": "function",
+                    "function": {"name": call.function.name, "arguments": call.function.arguments}
+                }
+                for call in tool_calls
+            ]
+        return message
+
+    @staticmethod
+    def _get_encoding(model: str):
+        """Obtiene el tokenizer del modelo, o None si tiktoken no está disponible."""
+        if tiktoken is None:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+
+    def _count_tokens(self, messages: List[Dict[str, Any]]) -> int:
+        """Cuenta (o estima, sin tiktoken) los tokens de una lista de mensajes."""
+        total = 0
+        for msg in messages:
+            text = (msg.get("content") or "") + str(msg.get("tool_calls") or "")
+            total += len(self._encoding.encode(text)) if self._encoding else len(text) // 4
+        return total
+
+    @classmethod
+    def _prune_tool_result(cls, value: Any) -> Any:
+        """
+        Recorta las listas de más de MAX_TOOL_RESULT_ITEMS elementos (a cualquier
+        profundidad) dejando un marcador con la cantidad omitida. No modifica el original.
+        """
+        if isinstance(value, dict):
+            return {key: cls._prune_tool_result(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            pruned = [cls._prune_tool_result(item) for item in value[:MAX_TOOL_RESULT_ITEMS]]
+            if len(value) > MAX_TOOL_RESULT_ITEMS:
+                pruned.append(f"... {len(value) - MAX_TOOL_RESULT_ITEMS} más")
+            return pruned
+        return value
+
+    @classmethod
+    def _tool_message_content(cls, result: Any) -> str:
+        """
+        Serializa la salida de una tool para el historial. Las listas largas se
+        podan antes de serializar y el texto final se trunca a MAX_TOOL_OUTPUT_CHARS;
+        el resultado completo sigue disponible en tool_results.
+        """
+        content = orjson.dumps(cls._prune_tool_result(result), option=orjson.OPT_NON_STR_KEYS).decode()
+        if len(content) > MAX_TOOL_OUTPUT_CHARS:
+            return content[:MAX_TOOL_OUTPUT_CHARS] + f"... [truncado, {len(content)} caracteres en total]"
+        return content
+
+    async def _compact_history(self):
+        """
+        Compacta el historial cuando supera max_history_tokens: los últimos
+        keep_recent_turns turnos se conservan textuales y los anteriores se
+        reemplazan por un resumen generado con summary_model.
+
+        El corte se hace siempre al inicio de un turno (mensaje del usuario),
+        para no separar un tool_call de su respuesta.
+        """
+        if self._count_tokens(self.conversation_history) <= self.max_history_tokens:
+            return
+
+        turn_starts = [i for i, msg in enumerate(self.conversation_history) if msg.get("role") == "user"]
+        if len(turn_starts) <= self.keep_recent_turns:
+            return
+
+        cut = turn_starts[-self.keep_recent_turns] if self.keep_recent_turns else len(self.conversation_history)
+        old_messages = self.conversation_history[:cut]
+        transcript = "\n".join(
+            f"{msg.get('role')}: {msg.get('content') or ''}" for msg in old_messages if msg.get("content")
+        )
+
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.summary_model,
+                messages=[
+                    {"role": "system", "content": "Resume la siguiente conversación conservando hechos, decisiones, IDs y resultados de herramientas relevantes. Sé conciso."},
+                    {"role": "user", "content": transcript}
+                ]
+            )
+            summary = response.choices[0].message.content or ""
+        except Exception as e:
+            logger.warning("⚠️ No se pudo resumir el historial, se mantiene completo: %s", e)
+            return
+
+        self.conversation_history = [
+            {"role": "system", "content": f"Resumen de la conversación anterior: {summary}"},
+            *self.conversation_history[cut:]
+        ]
+        logger.info("🗜️ Historial compactado: %d mensajes resumidos", len(old_messages))
+
     def clear_conversation(self):
         """Limpia el historial de conversación."""
         self.conversation_history = []
@@ -620,6 +1095,7 @@ class OpenAIAdapter:
                                 "type": "integer",
                                 "description": "Número de resultados por página",
                                 "default": 10,
+                                "minimum": 1,
                                 "maximum": 100
                             }
                         },
@@ -652,7 +1128,7 @@ class OpenAIAdapter:
                 "type": "function",
                 "function": {
                     "name": "github_list_issues",
-                    "description": "Listar issues de un repositorio",
+                    "description": "Listar issues de un repositorio (no incluye pull requests)",
                     "parameters": {
                         "type": "object",
                         "properties": {
@@ -674,6 +1150,7 @@ class OpenAIAdapter:
                                 "type": "integer",
                                 "description": "Número de issues por página",
                                 "default": 10,
+                                "minimum": 1,
                                 "maximum": 100
                             }
                         },
@@ -717,292 +1194,749 @@ class OpenAIAdapter:
             }
         ]
 
-    def _get_available_tools(self) -> List[Dict[str, Any]]:
-        """Obtiene la lista de tools disponibles."""
-        tools = []
+    def _refresh_tools_payload(self):
+        """
+        Recalcula el payload de tools (y su JSON) a partir de la configuración actual.
+        Se llama solo desde __init__ y los setters de adaptadores.
+        """
+        tools = ()
 
         # Agregar tools de Notion si el adaptador está configurado
         if self.notion_adapter:
-            tools.extend(self.notion_tools_definitions)
-
-        # Agregar tools de GitHub si están registradas
-        if hasattr(self, 'github_tools_definitions'):
-            tools.extend(self.github_tools_definitions)
+            tools += tuple(self.notion_tools_definitions)
 
-        return tools
+        # Agregar tools de GitHub (vacío hasta que se registren)
+        tools += tuple(self.github_tools_definitions)
 
-    def _execute_tools(self, tool_calls) -> List[Dict[str, Any]]:
-        """Ejecuta las tools llamadas por el modelo."""
-        print(f"⚙️ Ejecutando {len(tool_calls)} tool calls")
-        results = []
+        self._tools_payload = tools
+        self._tools_payload_json = orjson.dumps(tools, option=orjson.OPT_SORT_KEYS).decode()
 
-        for i, tool_call in enumerate(tool_calls, 1):
-            print(f"🔧 Tool call {i}: ID={tool_call.id}")
-            try:
-                function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
+        # Validadores compilados una sola vez por tool a partir de su JSON Schema
+        for tool in tools:
+            name = tool["function"]["name"]
+            if name not in self._validators:
+                self._validators[name] = fastjsonschema.compile(tool["function"]["parameters"])
 
-                print(f"📝 Función: {function_name}")
-                print(f"📋 Argumentos: {function_args}")
+    def _get_available_tools(self) -> Tuple[Dict[str, Any], ...]:
+        """Obtiene las tools disponibles, precalculadas por _refresh_tools_payload."""
+        return self._tools_payload
 
-                result = self._execute_tool_function(function_name, function_args)
+    def _execute_tools(self, tool_calls) -> List[ToolResult]:
+        """
+        Ejecuta las tools llamadas por el modelo.
+        Wrapper síncrono de _execute_tools_async para compatibilidad.
+        """
+        return _run_sync(lambda: self._execute_tools_async(tool_calls))
 
-                tool_result = {
-                    "tool_call_id": tool_call.id,
-                    "function_name": function_name,
-                    "result": result,
-                    "success": True
-                }
+    async def _execute_one(self, tool_call) -> ToolResult:
+        """
+        Ejecuta un tool call: parsea los argumentos, despacha la función y
+        convierte cualquier error en un resultado fallido.
+        """
+        function_name = tool_call.function.name
+        try:
+            # Un nombre inventado por el modelo se rechaza sin parsear los argumentos
+            if function_name not in self._known_tools:
+                raise ValueError(f"Función no reconocida: {function_name}")
 
-                results.append(tool_result)
-                print(f"✅ Tool {function_name} ejecutada exitosamente")
+            function_args = orjson.loads(tool_call.function.arguments)
+            logger.debug("🔧 Tool call %s: %s %s", tool_call.id, function_name, function_args)
 
-            except Exception as e:
-                print(f"❌ Error ejecutando tool {tool_call.function.name}: {e}")
-                print(f"Stack trace:")
-
-                tool_result = {
-                    "tool_call_id": tool_call.id,
-                    "function_name": tool_call.function.name,
-                    "result": {"error": str(e)},
-                    "success": False
-                }
+            result = await self._execute_tool_function(function_name, function_args)
 
-                results.append(tool_result)
+            logger.debug("✅ Tool %s ejecutada exitosamente", function_name)
+            return ToolResult(tool_call.id, function_name, result, True)
 
-        print(f"📊 Resultado: {sum(1 for r in results if r['success'])}/{len(results)} tools exitosas")
-        return results
+        except fastjsonschema.JsonSchemaException as e:
+            # Argumentos inválidos: se devuelve el detalle para que el modelo corrija la llamada
+            logger.warning("⚠️ Argumentos inválidos para %s: %s", function_name, e)
+            return ToolResult(tool_call.id, function_name, {"error": str(e), "schema_path": getattr(e, "path", None)}, False)
 
-    def _execute_tool_function(self, function_name: str, args: Dict[str, Any]) -> Any:
-        """Ejecuta una función específica de tool."""
-        print(f"🔍 Ejecutando función: {function_name}")
+        except Exception as e:
+            logger.error("❌ Error ejecutando tool %s: %s", function_name, e)
+            return ToolResult(tool_call.id, function_name, {"error": str(e)}, False)
 
-        if "notion" in function_name:
-            if not self.notion_adapter:
-                print("❌ Adaptador de Notion no configurado")
-                raise Exception("El adaptador de Notion no está configurado")
-            print("📝 Redirigiendo a función de Notion")
-            return self._execute_notion_function(function_name, args)
+    async def _execute_tools_async(self, tool_calls) -> List[ToolResult]:
+        """
+        Ejecuta las tools llamadas por el modelo de forma concurrente.
+        La latencia total pasa a ser la de la tool más lenta en lugar de la suma.
+        """
+        logger.debug("⚙️ Ejecutando %d tool calls en paralelo", len(tool_calls))
+
+        # Las lecturas idénticas (misma función y argumentos) se ejecutan una sola vez;
+        # las tools con efectos secundarios se ejecutan siempre
+        first_by_signature = {}
+        duplicates = {}
+
+        # Las lecturas de GitHub van por GraphQL (solo los campos necesarios) y las
+        # del mismo turno se agrupan en una sola consulta
+        graphql_group = []
+        results_by_id = {}
+
+        # Las tools fusionables sobre el mismo destino se agrupan en una sola llamada
+        fused_groups: Dict[tuple, List] = {}
+        jobs = []
+        for tool_call in tool_calls:
+            signature = self._tool_call_signature(tool_call)
+            if signature is not None:
+                if signature in first_by_signature:
+                    duplicates[tool_call.id] = first_by_signature[signature]
+                    continue
+                first_by_signature[signature] = tool_call.id
+
+            if tool_call.function.name in FUSIBLE_NOTION_TOOLS:
+                key_param, items_param, _ = FUSIBLE_NOTION_TOOLS[tool_call.function.name]
+                try:
+                    args = orjson.loads(tool_call.function.arguments)
+                    group_key = (tool_call.function.name, args[key_param])
+                    fused_groups.setdefault(group_key, []).append((tool_call, list(args[items_param])))
+                    continue
+                except (ValueError, KeyError, TypeError):
+                    pass  # Argumentos inválidos: el error se reporta por el camino normal
+            elif tool_call.function.name in GITHUB_GRAPHQL_TOOLS:
+                try:
+                    args = self._validators[tool_call.function.name](orjson.loads(tool_call.function.arguments))
+                    cached = self._ro_cache.get(self._read_only_cache_key(tool_call.function.name, args))
+                    if cached is not None:
+                        results_by_id[tool_call.id] = ToolResult(tool_call.id, tool_call.function.name, cached, True)
+                    else:
+                        graphql_group.append((tool_call, args))
+                    continue
+                except (ValueError, KeyError, fastjsonschema.JsonSchemaException):
+                    pass  # Argumentos inválidos: el error se reporta por el camino normal
+            jobs.append(self._execute_one(tool_call))
+
+        if graphql_group:
+            jobs.append(self._run_github_graphql_batch(graphql_group))
+
+        for (function_name, target_id), group in fused_groups.items():
+            if len(group) == 1:
+                jobs.append(self._execute_one(group[0][0]))
+            else:
+                jobs.append(self._run_fused_batch(function_name, target_id, group))
 
-        elif "github" in function_name:
-            print("🐙 Redirigiendo a función de GitHub")
-            return self._execute_github_function(function_name, args)
+        for outcome in await asyncio.gather(*jobs):
+            for result in outcome if isinstance(outcome, list) else [outcome]:
+                results_by_id[result.tool_call_id] = result
 
-        else:
-            print(f"❓ Función no reconocida: {function_name}")
-            raise Exception(f"Función no reconocida: {function_name}")
+        for tool_call_id, original_id in duplicates.items():
+            results_by_id[tool_call_id] = results_by_id[original_id]._replace(tool_call_id=tool_call_id)
+        if duplicates:
+            logger.debug("♻️ %d tool calls duplicados reutilizaron un resultado", len(duplicates))
 
-    def _execute_notion_function(self, function_name: str, args: Dict[str, Any]) -> Any:
-        """Ejecuta funciones del adaptador de Notion."""
-        print(f"📝 Ejecutando función de Notion: {function_name}")
-        print(f"📋 Argumentos: {args}")
+        # Mantener el orden de los tool_calls originales
+        results = [results_by_id[tool_call.id] for tool_call in tool_calls]
+        logger.debug("📊 Resultado: %d/%d tools exitosas", sum(1 for r in results if r.success), len(results))
+        return results
 
+    @staticmethod
+    def _tool_call_signature(tool_call) -> Optional[tuple]:
+        """
+        Firma canónica de un tool call (función + argumentos con claves ordenadas),
+        o None si no se puede deduplicar: tools con efectos secundarios (dos
+        append o create idénticos son pedidos legítimos) o argumentos que no
+        son JSON válido.
+        """
+        if tool_call.function.name not in READ_ONLY_TOOLS:
+            return None
         try:
-            if function_name == "search_notion_pages":
-                print("🔍 Buscando páginas en Notion...")
-                result = self.notion_adapter.search_pages(**args)
-                print(f"📄 Páginas encontradas: {len(result) if isinstance(result, list) else 'N/A'}")
-                return result
-
-            elif function_name == "read_notion_page":
-                page_id = args["page_id"]
-                print(f"📖 Leyendo página de Notion: {page_id}")
-                result = self.notion_adapter.read_page(page_id)
-                print(f"📄 Página leída: {result.get('title', 'Sin título')}")
-                return result
-
-            elif function_name == "update_notion_page":
-                page_id = args["page_id"]
-                print(f"✏️ Actualizando página de Notion: {page_id}")
-                result = self.notion_adapter.update_page(page_id, args["updates"])
-                print("✅ Página actualizada")
-                return result
-
-            elif function_name == "create_notion_page":
-                print("➕ Creando nueva página en Notion...")
-                result = self.notion_adapter.create_page(**args)
-                print(f"✅ Página creada: {result.get('id', 'ID desconocido')}")
-                return result
-
-            elif function_name == "update_notion_block":
-                block_id = args["block_id"]
-                updates = args["updates"]
-                print(f"🔧 Actualizando block específico: {block_id}")
-                result = self.notion_adapter.update_block(block_id, updates)
-                print("✅ Block actualizado")
-                return result
-
-            elif function_name == "append_notion_blocks":
-                parent_id = args["parent_id"]
-                blocks = args["blocks"]
-                print(f"➕ Agregando {len(blocks)} blocks a {parent_id}")
-                result = self.notion_adapter.append_blocks(parent_id, blocks)
-                print(f"✅ {result.get('blocks_added', 0)} blocks agregados")
-                return result
-
-            elif function_name == "get_notion_page_blocks":
-                page_id = args["page_id"]
-                print(f"📋 Obteniendo blocks de página: {page_id}")
-                result = self.notion_adapter.get_page_blocks(page_id)
-                print(f"✅ {len(result)} blocks obtenidos")
-                return result
-
-            elif function_name == "delete_notion_block":
-                block_id = args["block_id"]
-                print(f"🗑️ Eliminando block: {block_id}")
-                result = self.notion_adapter.delete_block(block_id)
-                print("✅ Block eliminado")
-                return result
-
-            elif function_name == "update_notion_block_smart":
-                block_id = args["block_id"]
-                updates = args["updates"]
-                print(f"🔧 Actualizando block (smart): {block_id}")
-                result = self.notion_adapter.update_block_smart(block_id, updates)
-                print("✅ Block actualizado (smart)")
-                return result
-
-            elif function_name == "reorganize_notion_blocks":
-                page_id = args["page_id"]
-                operations = args["operations"]
-                print(f"🔄 Reorganizando blocks en página: {page_id}")
-                result = self.notion_adapter.reorganize_blocks(page_id, operations)
-                print(f"✅ {result.get('operations_completed', 0)} operaciones completadas")
-                return result
-
-            elif function_name == "reorganize_notion_blocks_completely":
-                page_id = args["page_id"]
-                block_order = args["block_order"]
-                print(f"🔄 Reorganizando completamente blocks en página: {page_id}")
-                result = self.notion_adapter.reorganize_blocks_completely(page_id, block_order)
-                print(f"✅ Reorganización completa: {result.get('blocks_created', 0)} blocks creados")
-                return result
-
-            elif function_name == "cleanup_notion_duplicate_blocks":
-                page_id = args["page_id"]
-                block_ids = args["block_ids"]
-                print(f"🧹 Limpiando duplicados en página: {page_id}")
-                result = self.notion_adapter.cleanup_duplicate_blocks(page_id, block_ids)
-                print(f"✅ Duplicados eliminados: {result.get('duplicates_removed', 0)}")
-                return result
+            args = orjson.loads(tool_call.function.arguments)
+        except ValueError:
+            return None
+        return tool_call.function.name, orjson.dumps(args, option=orjson.OPT_SORT_KEYS)
+
+    @staticmethod
+    def _read_only_cache_key(function_name: str, args: Dict[str, Any]) -> str:
+        """Clave de la cache de tools de solo lectura."""
+        return LLMCache.make_key({"tool": function_name, "args": args}, prefix="tool:")
 
+    async def _run_github_graphql_batch(self, group: List) -> List[ToolResult]:
+        """
+        Ejecuta lecturas de GitHub en una sola consulta GraphQL, con un alias
+        por tool call, en lugar de un round-trip por cada una.
+
+        Args:
+            group: Lista de (tool_call, args validados)
+
+        Returns:
+            Un resultado por tool call
+        """
+        logger.debug("🐙 Agrupando %d lecturas de GitHub en una consulta GraphQL", len(group))
+        outcomes = await self._github_graphql_reads([(tool_call.function.name, args) for tool_call, args in group])
+
+        results = []
+        for (tool_call, args), (value, error) in zip(group, outcomes):
+            if error is not None:
+                results.append(ToolResult(tool_call.id, tool_call.function.name, {"error": error}, False))
             else:
-                print(f"❓ Función de Notion no reconocida: {function_name}")
-                raise Exception(f"Función de Notion no reconocida: {function_name}")
+                self._ro_cache.set(self._read_only_cache_key(tool_call.function.name, args), value)
+                results.append(ToolResult(tool_call.id, tool_call.function.name, value, True))
+        return results
+
+    async def _github_graphql_reads(self, reads: List) -> List[tuple]:
+        """
+        Resuelve lecturas de GitHub en una sola consulta GraphQL, con un alias
+        por lectura. Es el único camino de lectura de GitHub, así el primer turno
+        (agrupado) y los siguientes (una tool por vez) devuelven la misma forma.
 
+        Args:
+            reads: Lista de (nombre de la tool, args validados)
+
+        Returns:
+            Una tupla (valor, error) por lectura; error es None si salió bien
+        """
+        fields, declarations, variables, extractors = [], [], {}, {}
+        for i, (function_name, args) in enumerate(reads):
+            alias = f"r{i}"
+            field, field_variables, extract = self._github_graphql_field(alias, function_name, args)
+            fields.append(field)
+            for name, (graphql_type, value) in field_variables.items():
+                declarations.append(f"${name}: {graphql_type}")
+                variables[name] = value
+            extractors[alias] = extract
+
+        query = f"query({', '.join(declarations)}) {{ {' '.join(fields)} }}"
+
+        try:
+            body = await self._github_request("POST", "/graphql", json_body={"query": query, "variables": variables})
         except Exception as e:
-            print(f"❌ Error en función de Notion {function_name}: {e}")
-            raise
+            logger.error("❌ Error en consulta GraphQL de GitHub: %s", e)
+            body = {"errors": [{"message": str(e)}]}
+
+        data = body.get("data") or {}
+        errors = body.get("errors") or []
+        errors_by_alias = {error["path"][0]: error.get("message") for error in errors if error.get("path")}
+        general_error = errors[0].get("message") if errors else "Respuesta GraphQL sin datos"
+
+        outcomes = []
+        for i in range(len(reads)):
+            alias = f"r{i}"
+            value = data.get(alias)
+            if value is None:
+                outcomes.append((None, errors_by_alias.get(alias, general_error)))
+            else:
+                outcomes.append((extractors[alias](value), None))
+        return outcomes
+
+    async def _github_graphql_read(self, function_name: str, args: Dict[str, Any]) -> Any:
+        """Ejecuta una sola lectura de GitHub por GraphQL; lanza excepción si falla."""
+        (value, error), = await self._github_graphql_reads([(function_name, args)])
+        if error is not None:
+            raise Exception(error)
+        return value
+
+    @staticmethod
+    def _github_graphql_field(alias: str, function_name: str, args: Dict[str, Any]):
+        """
+        Traduce una lectura de GitHub a un campo GraphQL con alias.
+
+        Args:
+            alias: Alias del campo dentro de la consulta
+            function_name: Nombre de la tool (una de GITHUB_GRAPHQL_TOOLS)
+            args: Argumentos validados de la tool
+
+        Returns:
+            Tupla (campo, {variable: (tipo, valor)}, función que extrae el resultado)
+        """
+        if function_name == "github_get_repository":
+            return (
+                f"{alias}: repository(owner: ${alias}_owner, name: ${alias}_repo) {{ {GITHUB_REPOSITORY_FIELDS} }}",
+                {f"{alias}_owner": ("String!", args["owner"]), f"{alias}_repo": ("String!", args["repo"])},
+                _flatten_github_repository
+            )
+
+        if function_name == "github_list_issues":
+            return (
+                f"{alias}: repository(owner: ${alias}_owner, name: ${alias}_repo) {{ "
+                f"issues(first: ${alias}_first, states: ${alias}_states, orderBy: {{field: CREATED_AT, direction: DESC}}) "
+                f"{{ nodes {{ {GITHUB_ISSUE_FIELDS} }} }} }}",
+                {
+                    f"{alias}_owner": ("String!", args["owner"]),
+                    f"{alias}_repo": ("String!", args["repo"]),
+                    f"{alias}_first": ("Int!", args["per_page"]),
+                    f"{alias}_states": ("[IssueState!]", GITHUB_ISSUE_STATES[args["state"]]),
+                },
+                lambda value: [_flatten_github_issue(issue) for issue in value["issues"]["nodes"]]
+            )
+
+        # github_search_repositories: el orden se expresa como calificador de la búsqueda
+        return (
+            f"{alias}: search(query: ${alias}_query, type: REPOSITORY, first: ${alias}_first) {{ "
+            f"total_count: repositoryCount items: nodes {{ ... on Repository {{ {GITHUB_SEARCH_REPOSITORY_FIELDS} }} }} }}",
+            {
+                f"{alias}_query": ("String!", f"{args['query']} sort:{args['sort']}"),
+                f"{alias}_first": ("Int!", args["per_page"]),
+            },
+            lambda value: {**value, "items": [_flatten_github_repository(item) for item in value["items"]]}
+        )
+
+    async def _run_fused_batch(self, function_name: str, target_id: str, group: List) -> List[ToolResult]:
+        """
+        Ejecuta varias llamadas de una tool fusionable sobre el mismo destino
+        como una sola, concatenando sus listas en el orden pedido (ver FUSIBLE_NOTION_TOOLS).
+
+        Args:
+            function_name: Tool a ejecutar
+            target_id: ID de la página/parent común
+            group: Lista de (tool_call, items) en el orden en que los pidió el modelo
 
-    def _execute_github_function(self, function_name: str, args: Dict[str, Any]) -> Any:
-        """Ejecuta funciones de GitHub MCP."""
-        print(f"🐙 Ejecutando función de GitHub: {function_name}")
-        print(f"📋 Argumentos: {args}")
+        Returns:
+            Un resultado por tool call, con la parte de la respuesta real que le corresponde
+        """
+        key_param, items_param, batch_size = FUSIBLE_NOTION_TOOLS[function_name]
+        items = [item for _, call_items in group for item in call_items]
+        logger.debug("📦 Agrupando %d %s en %s: %d elementos", len(group), function_name, target_id, len(items))
 
-        base_url = "https://api.github.com"
-        headers = {
-            "Authorization": f"token {self.github_token}",
-            "Accept": "application/vnd.github.v3+json"
+        if not batch_size:
+            # Una sola llamada conjunta: cada tool call recibe la respuesta real (p. ej.
+            # duplicates_removed), marcada con cuántas llamadas la compartieron
+            try:
+                result = await self._execute_tool_function(function_name, {key_param: target_id, items_param: items})
+            except Exception as e:
+                logger.error("❌ Error en %s agrupado sobre %s: %s", function_name, target_id, e)
+                return [
+                    ToolResult(tool_call.id, function_name, {"error": str(e)}, False)
+                    for tool_call, _ in group
+                ]
+            if isinstance(result, dict):
+                result = {**result, "batched_calls": len(group)}
+            return [ToolResult(tool_call.id, function_name, result, True) for tool_call, _ in group]
+
+        # Las tandas se ejecutan en orden; si una falla, las anteriores ya quedaron escritas
+        chunks = []
+        error = None
+        for start in range(0, len(items), batch_size):
+            end = min(start + batch_size, len(items))
+            try:
+                result = await self._execute_tool_function(
+                    function_name, {key_param: target_id, items_param: items[start:end]}
+                )
+            except Exception as e:
+                logger.error("❌ Error en %s agrupado sobre %s (elementos %d-%d): %s", function_name, target_id, start, end, e)
+                error = e
+                break
+            chunks.append((start, end, result))
+        written = chunks[-1][1] if chunks else 0
+
+        results = []
+        call_start = 0
+        for tool_call, call_items in group:
+            call_end = call_start + len(call_items)
+            parts = [
+                self._slice_chunk_result(result, max(call_start, start) - start, min(call_end, end) - start, end - start)
+                for start, end, result in chunks
+                if start < call_end and call_start < end
+            ]
+            if call_end <= written:
+                results.append(ToolResult(tool_call.id, function_name, parts[0] if len(parts) == 1 else {"chunks": parts}, True))
+            else:
+                # Se informa cuántos elementos de esta llamada sí se escribieron, para no duplicarlos al reintentar
+                results.append(ToolResult(
+                    tool_call.id,
+                    function_name,
+                    {"error": str(error), f"{items_param}_written": max(0, written - call_start), "partial_results": parts},
+                    False
+                ))
+            call_start = call_end
+        return results
+
+    @staticmethod
+    def _slice_chunk_result(result: Any, start: int, end: int, chunk_size: int) -> Any:
+        """
+        Recorta el resultado de una tanda a los elementos [start, end) que
+        pidió una llamada: las listas alineadas 1 a 1 con los elementos de la
+        tanda (p. ej. los blocks creados) se recortan y blocks_added se ajusta.
+        """
+        if (start, end) == (0, chunk_size) or not isinstance(result, dict):
+            return result
+        sliced = {
+            key: value[start:end] if isinstance(value, list) and len(value) == chunk_size else value
+            for key, value in result.items()
         }
+        if "blocks_added" in sliced:
+            sliced["blocks_added"] = end - start
+        return sliced
+
+    async def _stream_completion_with_tools(self, messages: List[Dict[str, Any]], tools: Tuple[Dict[str, Any], ...]):
+        """
+        Hace una llamada en streaming y ejecuta cada tool call en cuanto sus
+        argumentos JSON llegan completos, solapando la ejecución de tools con
+        la generación del resto de la respuesta. Las tools fusionables, las
+        lecturas de GitHub y los duplicados se difieren al final del stream
+        y pasan por _execute_tools_async, igual que en el primer turno.
+
+        Args:
+            messages: Mensajes a enviar
+            tools: Tools disponibles
 
+        Returns:
+            Tupla (contenido, tool_calls en formato dict, resultados de las tools)
+        """
+        stream = await self.chat_create(
+            messages=messages,
+            tools=tools,
+            tool_choice="auto",
+            stream=True
+        )
+
+        content_parts = []
+        calls: Dict[int, Dict[str, Any]] = {}
+        tasks: Dict[int, asyncio.Task] = {}
+        started: Dict[tuple, int] = {}
+
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content_parts.append(delta.content)
+
+            for tool_call_delta in delta.tool_calls or []:
+                index = tool_call_delta.index
+                call = calls.setdefault(index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+                if tool_call_delta.id:
+                    call["id"] = tool_call_delta.id
+                if tool_call_delta.function:
+                    call["function"]["name"] += tool_call_delta.function.name or ""
+                    call["function"]["arguments"] += tool_call_delta.function.arguments or ""
+
+                name = call["function"]["name"]
+                if (
+                    index not in tasks and call["id"] and name
+                    and name not in FUSIBLE_NOTION_TOOLS and name not in GITHUB_GRAPHQL_TOOLS
+                    and self._is_complete_json(call["function"]["arguments"])
+                ):
+                    tool_call = ChatCompletionMessageToolCall.model_validate(call)
+                    signature = self._tool_call_signature(tool_call)
+                    if signature is None or signature not in started:
+                        if signature is not None:
+                            started[signature] = index
+                        tasks[index] = asyncio.create_task(self._execute_one(tool_call))
+
+        # Un tool call sin id haría fallar la validación y abortaría todo el chat;
+        # se le asigna uno para que el error (si lo hay) llegue como resultado de la tool
+        for call in calls.values():
+            if not call["id"]:
+                call["id"] = f"call_{uuid.uuid4().hex}"
+
+        indexes = sorted(calls)
+        duplicates = {}
+        pending = []
+        for index in indexes:
+            if index in tasks:
+                continue
+            tool_call = ChatCompletionMessageToolCall.model_validate(calls[index])
+            original = started.get(self._tool_call_signature(tool_call))
+            if original is not None:
+                duplicates[index] = original
+            else:
+                pending.append((index, tool_call))
+
+        # El resto recibe el mismo pase que el primer turno: deduplicación, fusión y GraphQL
+        started_indexes = list(tasks)
+        started_results, pending_results = await asyncio.gather(
+            asyncio.gather(*tasks.values()),
+            self._execute_tools_async([tool_call for _, tool_call in pending]) if pending else asyncio.sleep(0, [])
+        )
+        results_by_index = dict(zip(started_indexes, started_results))
+        results_by_index.update(zip((index for index, _ in pending), pending_results))
+        for index, original in duplicates.items():
+            results_by_index[index] = results_by_index[original]._replace(tool_call_id=calls[index]["id"])
+
+        return "".join(content_parts) or None, [calls[index] for index in indexes], [results_by_index[index] for index in indexes]
+
+    @staticmethod
+    def _is_complete_json(arguments: str) -> bool:
+        """Indica si los argumentos acumulados de un tool call ya son un JSON completo."""
         try:
-            if function_name == "github_search_repositories":
-                query = args["query"]
-                sort = args.get("sort", "stars")
-                per_page = min(args.get("per_page", 10), 100)
-
-                print(f"🔍 Buscando repositorios en GitHub: '{query}' (orden: {sort})")
-                url = f"{base_url}/search/repositories?q={query}&sort={sort}&per_page={per_page}"
-                print(f"🌐 URL: {url}")
-
-                response = requests.get(url, headers=headers)
-                print(f"📡 HTTP Status: {response.status_code}")
-                response.raise_for_status()
-
-                result = response.json()
-                print(f"📊 Repositorios encontrados: {result.get('total_count', 0)}")
-                return result
-
-            elif function_name == "github_get_repository":
-                owner = args["owner"]
-                repo = args["repo"]
-
-                print(f"📖 Obteniendo repositorio: {owner}/{repo}")
-                url = f"{base_url}/repos/{owner}/{repo}"
-                print(f"🌐 URL: {url}")
-
-                response = requests.get(url, headers=headers)
-                print(f"📡 HTTP Status: {response.status_code}")
-                response.raise_for_status()
-
-                result = response.json()
-                print(f"✅ Repositorio obtenido: {result.get('name', 'N/A')}")
-                return result
-
-            elif function_name == "github_list_issues":
-                owner = args["owner"]
-                repo = args["repo"]
-                state = args.get("state", "open")
-                per_page = min(args.get("per_page", 10), 100)
-
-                print(f"📋 Listando issues de {owner}/{repo} (estado: {state})")
-                url = f"{base_url}/repos/{owner}/{repo}/issues?state={state}&per_page={per_page}"
-                print(f"🌐 URL: {url}")
-
-                response = requests.get(url, headers=headers)
-                print(f"📡 HTTP Status: {response.status_code}")
-                response.raise_for_status()
-
-                result = response.json()
-                print(f"📊 Issues encontrados: {len(result) if isinstance(result, list) else 0}")
-                return result
-
-            elif function_name == "github_create_issue":
-                owner = args["owner"]
-                repo = args["repo"]
-                title = args["title"]
-
-                print(f"➕ Creando issue en {owner}/{repo}: '{title}'")
-                issue_data = {
-                    "title": title,
-                    "body": args.get("body", ""),
-                    "labels": args.get("labels", [])
-                }
-                print(f"📝 Datos del issue: {issue_data}")
+            return isinstance(orjson.loads(arguments), dict)
+        except ValueError:
+            return False
+
+    def _build_tool_dispatch(self) -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+        """
+        Construye la tabla nombre de tool -> handler. Se arma una sola vez en
+        __init__ para que despachar un tool call sea un único lookup.
+        """
+        return {
+            # Notion
+            "search_notion_pages": self._notion_search_pages,
+            "read_notion_page": self._notion_read_page,
+            "update_notion_page": self._notion_update_page,
+            "create_notion_page": self._notion_create_page,
+            "update_notion_block": self._notion_update_block,
+            "append_notion_blocks": self._notion_append_blocks,
+            "get_notion_page_blocks": self._notion_get_page_blocks,
+            "delete_notion_block": self._notion_delete_block,
+            "update_notion_block_smart": self._notion_update_block_smart,
+            "reorganize_notion_blocks": self._notion_reorganize_blocks,
+            "reorganize_notion_blocks_completely": self._notion_reorganize_blocks_completely,
+            "cleanup_notion_duplicate_blocks": self._notion_cleanup_duplicate_blocks,
+            # GitHub
+            "github_search_repositories": self._github_search_repositories,
+            "github_get_repository": self._github_get_repository,
+            "github_list_issues": self._github_list_issues,
+            "github_create_issue": self._github_create_issue,
+        }
 
-                url = f"{base_url}/repos/{owner}/{repo}/issues"
-                print(f"🌐 URL: {url}")
+    def _build_single_arg_dispatch(self) -> Dict[str, Tuple[str, Callable[[str], Any]]]:
+        """
+        Fast path para las tools de Notion cuyo schema tiene un único parámetro
+        string (page_id / block_id): nombre -> (parámetro, función que recibe el valor).
+        """
+        dispatch = {}
+        for tool in self.notion_tools_definitions:
+            name = tool["function"]["name"]
+            properties = tool["function"]["parameters"]["properties"]
+            method = NOTION_SINGLE_ARG_METHODS.get(name)
+            if method is None or len(properties) != 1:
+                continue
+
+            (key, schema), = properties.items()
+            if schema.get("type") == "string":
+                dispatch[name] = (key, lambda value, method=method: getattr(self._require_notion_adapter(), method)(value))
+        return dispatch
+
+    async def _execute_tool_function(self, function_name: str, args: Dict[str, Any]) -> Any:
+        """
+        Ejecuta una función específica de tool. Los handlers async (GitHub) se
+        esperan en el loop; los síncronos (Notion) van al thread pool para no bloquearlo.
+        """
+        if function_name not in self._known_tools:
+            logger.warning("❓ Función no reconocida: %s", function_name)
+            raise ValueError(f"Función no reconocida: {function_name}")
 
-                response = requests.post(url, headers=headers, json=issue_data)
-                print(f"📡 HTTP Status: {response.status_code}")
-                response.raise_for_status()
+        logger.debug("🔍 Ejecutando función: %s", function_name)
+        logger.debug("📋 Argumentos: %s", args)
 
-                result = response.json()
-                print(f"✅ Issue creado: #{result.get('number', 'N/A')}")
-                return result
+        handler = self._tool_dispatch[function_name]
 
-            else:
-                print(f"❓ Función de GitHub no reconocida: {function_name}")
-                raise Exception(f"Función de GitHub no reconocida: {function_name}")
+        single_arg = self._single_arg_dispatch.get(function_name)
+        if single_arg is not None and len(args) == 1 and isinstance(args.get(single_arg[0]), str):
+            # Un único ID string: ya cumple el schema, se llama directo con el valor
+            call = functools.partial(single_arg[1], args[single_arg[0]])
+        else:
+            # Valida los argumentos y aplica los defaults declarados en el schema
+            validator = self._validators.get(function_name)
+            if validator is not None:
+                args = validator(args)
+            call = functools.partial(handler, args)
+
+        read_only = function_name in READ_ONLY_TOOLS
+        if read_only:
+            cache_key = self._read_only_cache_key(function_name, args)
+            cached = self._ro_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("⚡ Resultado de %s obtenido de cache", function_name)
+                return cached
 
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Error HTTP en función de GitHub {function_name}: {e}")
+        try:
+            if asyncio.iscoroutinefunction(handler):
+                result = await call()
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._tool_pool, call)
+        except httpx.HTTPError as e:
+            logger.error("❌ Error HTTP en función %s: %s", function_name, e)
             raise
         except Exception as e:
-            print(f"❌ Error en función de GitHub {function_name}: {e}")
+            logger.error("❌ Error en función %s: %s", function_name, e)
             raise
 
+        if read_only:
+            self._ro_cache.set(cache_key, result)
+        else:
+            # Una escritura puede dejar obsoleta cualquier lectura cacheada
+            self._ro_cache.clear()
+        return result
+
+    # Funciones de Notion
+
+    def _require_notion_adapter(self) -> NotionAdapter:
+        """Devuelve el adaptador de Notion o falla si no está configurado."""
+        if not self.notion_adapter:
+            logger.error("❌ Adaptador de Notion no configurado")
+            raise Exception("El adaptador de Notion no está configurado")
+        return self.notion_adapter
+
+    def _notion_search_pages(self, args: Dict[str, Any]) -> Any:
+        logger.debug("🔍 Buscando páginas en Notion...")
+        result = self._require_notion_adapter().search_pages(**args)
+        logger.debug("📄 Páginas encontradas: %s", len(result) if isinstance(result, list) else 'N/A')
+        return result
+
+    def _notion_read_page(self, args: Dict[str, Any]) -> Any:
+        page_id = args["page_id"]
+        logger.debug("📖 Leyendo página de Notion: %s", page_id)
+        result = self._require_notion_adapter().read_page(page_id)
+        logger.debug("📄 Página leída: %s", result.get('title', 'Sin título'))
+        return result
+
+    def _notion_update_page(self, args: Dict[str, Any]) -> Any:
+        page_id = args["page_id"]
+        logger.debug("✏️ Actualizando página de Notion: %s", page_id)
+        result = self._require_notion_adapter().update_page(page_id, args["updates"])
+        logger.debug("✅ Página actualizada")
+        return result
+
+    def _notion_create_page(self, args: Dict[str, Any]) -> Any:
+        logger.debug("➕ Creando nueva página en Notion...")
+        result = self._require_notion_adapter().create_page(**args)
+        logger.debug("✅ Página creada: %s", result.get('id', 'ID desconocido'))
+        return result
+
+    def _notion_update_block(self, args: Dict[str, Any]) -> Any:
+        block_id = args["block_id"]
+        logger.debug("🔧 Actualizando block específico: %s", block_id)
+        result = self._require_notion_adapter().update_block(block_id, args["updates"])
+        logger.debug("✅ Block actualizado")
+        return result
+
+    def _notion_append_blocks(self, args: Dict[str, Any]) -> Any:
+        parent_id = args["parent_id"]
+        blocks = args["blocks"]
+        logger.debug("➕ Agregando %s blocks a %s", len(blocks), parent_id)
+        result = self._require_notion_adapter().append_blocks(parent_id, blocks)
+        logger.debug("✅ %s blocks agregados", result.get('blocks_added', 0))
+        return result
+
+    def _notion_get_page_blocks(self, args: Dict[str, Any]) -> Any:
+        page_id = args["page_id"]
+        logger.debug("📋 Obteniendo blocks de página: %s", page_id)
+        result = self._require_notion_adapter().get_page_blocks(page_id)
+        logger.debug("✅ %s blocks obtenidos", len(result))
+        return result
+
+    def _notion_delete_block(self, args: Dict[str, Any]) -> Any:
+        block_id = args["block_id"]
+        logger.debug("🗑️ Eliminando block: %s", block_id)
+        result = self._require_notion_adapter().delete_block(block_id)
+        logger.debug("✅ Block eliminado")
+        return result
+
+    def _notion_update_block_smart(self, args: Dict[str, Any]) -> Any:
+        block_id = args["block_id"]
+        logger.debug("🔧 Actualizando block (smart): %s", block_id)
+        result = self._require_notion_adapter().update_block_smart(block_id, args["updates"])
+        logger.debug("✅ Block actualizado (smart)")
+        return result
+
+    def _notion_reorganize_blocks(self, args: Dict[str, Any]) -> Any:
+        page_id = args["page_id"]
+        logger.debug("🔄 Reorganizando blocks en página: %s", page_id)
+        result = self._require_notion_adapter().reorganize_blocks(page_id, args["operations"])
+        logger.debug("✅ %s operaciones completadas", result.get('operations_completed', 0))
+        return result
+
+    def _notion_reorganize_blocks_completely(self, args: Dict[str, Any]) -> Any:
+        page_id = args["page_id"]
+        logger.debug("🔄 Reorganizando completamente blocks en página: %s", page_id)
+        result = self._require_notion_adapter().reorganize_blocks_completely(page_id, args["block_order"])
+        logger.debug("✅ Reorganización completa: %s blocks creados", result.get('blocks_created', 0))
+        return result
+
+    def _notion_cleanup_duplicate_blocks(self, args: Dict[str, Any]) -> Any:
+        page_id = args["page_id"]
+        logger.debug("🧹 Limpiando duplicados en página: %s", page_id)
+        result = self._require_notion_adapter().cleanup_duplicate_blocks(page_id, args["block_ids"])
+        logger.debug("✅ Duplicados eliminados: %s", result.get('duplicates_removed', 0))
+        return result
+
+    # Funciones de GitHub
+
+    async def _github_request(self, method: str, path: str, json_body: Any = None, **kwargs) -> Any:
+        """
+        Hace un request a la API de GitHub sobre la sesión HTTP compartida.
+        Los GET se reintentan ante errores transitorios (502/503/504) con
+        backoff exponencial; los POST no, para no crear recursos duplicados.
+
+        Args:
+            method: Método HTTP
+            path: Path relativo a GITHUB_API_URL
+            json_body: Cuerpo a enviar como JSON (opcional)
+            **kwargs: Argumentos extra para httpx (params, ...)
+
+        Returns:
+            Cuerpo de la respuesta parseado
+        """
+        headers = self._gh_headers
+        if json_body is not None:
+            kwargs["content"] = orjson.dumps(json_body)
+            headers = self._gh_json_headers
+
+        attempts = GITHUB_MAX_RETRIES + 1 if method == "GET" else 1
+        for attempt in range(attempts):
+            response = await self.http.request(
+                method, f"{GITHUB_API_URL}{path}", headers=headers, timeout=GITHUB_TIMEOUT, **kwargs
+            )
+            logger.debug("📡 %s %s -> HTTP %s", method, response.url, response.status_code)
+            if response.status_code not in GITHUB_RETRY_STATUSES or attempt == attempts - 1:
+                break
+            await asyncio.sleep(0.2 * 2 ** attempt)
+
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+    async def _github_search_repositories(self, args: Dict[str, Any]) -> Any:
+        query = args["query"]
+        sort = args["sort"]
+        per_page = args["per_page"]
+
+        logger.debug("🔍 Buscando repositorios en GitHub: '%s' (orden: %s, hasta %s)", query, sort, per_page)
+        result = await self._github_graphql_read("github_search_repositories", args)
+        logger.debug("📊 Repositorios encontrados: %s", result.get('total_count', 0))
+        return result
+
+    async def _github_get_repository(self, args: Dict[str, Any]) -> Any:
+        owner = args["owner"]
+        repo = args["repo"]
+
+        logger.debug("📖 Obteniendo repositorio: %s/%s", owner, repo)
+        result = await self._github_graphql_read("github_get_repository", args)
+        logger.debug("✅ Repositorio obtenido: %s", result.get('name', 'N/A'))
+        return result
+
+    async def _github_list_issues(self, args: Dict[str, Any]) -> Any:
+        owner = args["owner"]
+        repo = args["repo"]
+        state = args["state"]
+        per_page = args["per_page"]
+
+        logger.debug("📋 Listando issues de %s/%s (estado: %s, hasta %s)", owner, repo, state, per_page)
+        result = await self._github_graphql_read("github_list_issues", args)
+        logger.debug("📊 Issues encontrados: %s", len(result))
+        return result
+
+    async def _github_create_issue(self, args: Dict[str, Any]) -> Any:
+        owner = args["owner"]
+        repo = args["repo"]
+        title = args["title"]
+
+        logger.debug("➕ Creando issue en %s/%s: '%s'", owner, repo, title)
+        issue_data = {
+            "title": title,
+            "body": args.get("body", ""),
+            "labels": args.get("labels", [])
+        }
+        logger.debug("📝 Datos del issue: %s", issue_data)
+
+        result = await self._github_request("POST", f"/repos/{owner}/{repo}/issues", json_body=issue_data)
+        logger.debug("✅ Issue creado: #%s", result.get('number', 'N/A'))
+        return result
+
 
 # Función de conveniencia para crear instancia del adaptador
-def create_openai_adapter(api_key: Optional[str] = None, model: str = "gpt-5-mini") -> OpenAIAdapter:
+def create_openai_adapter(api_key: Optional[str] = None, model: str = "gpt-5-mini", response_cache: Optional[LLMCache] = None) -> OpenAIAdapter:
     """
     Crea una instancia del adaptador de OpenAI.
 
     Args:
         api_key: Token de API de OpenAI (opcional)
         model: Modelo a utilizar (opcional)
+        response_cache: Cache de respuestas exactas (opcional)
 
     Returns:
         Instancia de OpenAIAdapter
     """
-    return OpenAIAdapter(api_key, model)
+    return OpenAIAdapter(api_key, model, response_cache)
@@ -1,6 +1,188 @@
 import os
-from typing import List, Dict, Any, Optional
-from openai import OpenAI
+import asyncio
+import logging
+import operator
+import reprlib
+import threading
+import uuid
+import weakref
+import httpx
+import orjson
+from typing import List, Dict, Any, Optional, Callable
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from openai.types.responses import Response
+from .llm_cache import LLMCache, SemanticCache
+
+logger = logging.getLogger(__name__)
+
+
+# Pool de conexiones keep-alive hacia OpenAI: muchos chats concurrentes solapan la latencia de red
+# (HTTP/2 multiplexa los requests concurrentes sobre las mismas conexiones)
+OPENAI_HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100, keepalive_expiry=30.0)
+OPENAI_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# Estados finales de un batch de la Batch API
+BATCH_TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+# Preview acotado de outputs de tools para los logs: no materializa el str() completo
+_OUTPUT_REPR = reprlib.Repr()
+_OUTPUT_REPR.maxstring = 100
+_OUTPUT_REPR.maxother = 100
+
+
+class OrjsonAsyncHttpxClient(DefaultAsyncHttpxClient):
+    """
+    Cliente httpx para OpenAI que serializa los cuerpos JSON (tools, input de
+    approvals...) con orjson en lugar del json de la stdlib. Los requests
+    multipart (files.create) pasan sin tocar: httpx prioriza content sobre
+    files/data y el archivo se perdería.
+    """
+
+    def build_request(self, method, url, *, content=None, json=None, headers=None, **kwargs) -> httpx.Request:
+        if json is not None and content is None and kwargs.get("files") is None and kwargs.get("data") is None:
+            try:
+                content = orjson.dumps(json)
+            except TypeError:
+                pass  # Tipos que orjson no soporta: se deja el encoding por defecto
+            else:
+                json = None
+                headers = httpx.Headers(headers)
+                headers["Content-Type"] = "application/json"
+        return super().build_request(method, url, content=content, json=json, headers=headers, **kwargs)
+
+
+# Pools HTTP compartidos por todas las instancias del adaptador, uno por event loop
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_http_clients_lock = threading.Lock()
+
+
+def _shared_http_client() -> httpx.AsyncClient:
+    """
+    Devuelve el pool HTTP/2 hacia OpenAI del event loop actual, creándolo si
+    hace falta. Todas las instancias que corren en un mismo loop lo comparten,
+    así que las conexiones (y su handshake TLS) se reutilizan entre adaptadores.
+    """
+    loop = asyncio.get_running_loop()
+    with _http_clients_lock:
+        http = _http_clients.get(loop)
+        if http is None or http.is_closed:
+            http = OrjsonAsyncHttpxClient(http2=True, limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT)
+            _http_clients[loop] = http
+        return http
+
+
+async def close_shared_http_client():
+    """
+    Cierra el pool HTTP compartido del event loop actual (p.ej. al apagar la
+    aplicación). Corta los requests en curso de todas las instancias de ese loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _http_clients_lock:
+        http = _http_clients.pop(loop, None)
+    if http is not None:
+        await http.aclose()
+
+
+# Event loop de fondo donde corren los wrappers síncronos (chat() / chat_batch()).
+# Vive lo que el proceso, así que su pool HTTP compartido sobrevive entre llamadas.
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Devuelve el event loop de fondo, arrancando su hilo la primera vez."""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="openai-adapter-v2-loop", daemon=True).start()
+            _background_loop = loop
+        return _background_loop
+
+
+def _run_sync(make_coro: Callable[[], Any]) -> Any:
+    """
+    Ejecuta una corrutina desde código síncrono (wrappers chat() / chat_batch())
+    en el event loop de fondo y espera su resultado.
+
+    Funciona igual desde un hilo sin loop (BackgroundTasks, Timer) que desde
+    uno con un loop corriendo (p.ej. un endpoint async que termina llamando a
+    chat()), donde asyncio.run no se podría usar.
+
+    Args:
+        make_coro: Función sin argumentos que crea la corrutina
+
+    Returns:
+        Resultado de la corrutina
+    """
+    loop = _get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        # Bloquear el loop de fondo esperándose a sí mismo sería un deadlock
+        raise RuntimeError("Desde el event loop del adaptador usar la versión async (chat_async() / achat()) en lugar de chat()")
+
+    return asyncio.run_coroutine_threadsafe(make_coro(), loop).result()
+
+
+def _output_preview(output: Any) -> str:
+    """Preview de a lo sumo ~100 caracteres del output de un tool call."""
+    if not output:
+        return "(vacío)"
+    if isinstance(output, str):
+        # Solo se copia el prefijo, no el output entero
+        return output[:100] + "..." if len(output) > 100 else output
+    return _OUTPUT_REPR.repr(output)
+
+
+def _extract_message(item, extracted: Dict[str, Any]):
+    """Extrae el texto de un ResponseOutputMessage (el primer output_text)."""
+    for content_item in getattr(item, 'content', None) or ():
+        if getattr(content_item, 'type', None) == 'output_text' and hasattr(content_item, 'text'):
+            extracted["content"] = content_item.text
+            break
+
+
+# Lectura de todos los campos de un item en una sola llamada (attrgetter está en C).
+# Los modelos del SDK declaran todos estos campos, aunque sean opcionales.
+_MCP_CALL_FIELDS = operator.attrgetter("id", "name", "server_label", "arguments", "error", "output")
+_MCP_APPROVAL_FIELDS = operator.attrgetter("id", "name", "server_label", "arguments")
+
+
+def _extract_mcp_call(item, extracted: Dict[str, Any]):
+    """Extrae un tool call de un McpCall."""
+    call_id, name, server_label, arguments, error, output = _MCP_CALL_FIELDS(item)
+    extracted["tool_calls"].append({
+        "id": call_id,
+        "name": name,
+        "server_label": server_label,
+        "arguments": arguments,
+        "success": error is None,
+        "error": getattr(error, 'message', None) if error else None,
+        "output": output
+    })
+
+
+def _extract_mcp_approval_request(item, extracted: Dict[str, Any]):
+    """Extrae un approval request de MCP."""
+    request_id, name, server_label, arguments = _MCP_APPROVAL_FIELDS(item)
+    extracted["approval_requests"].append({
+        "id": request_id,
+        "type": 'mcp_approval_request',
+        "name": name,
+        "server_label": server_label,
+        "arguments": arguments
+    })
+
+
+# Tipo de item de response.output -> función que lo vuelca en el resultado extraído
+RESPONSE_ITEM_EXTRACTORS = {
+    "message": _extract_message,
+    "mcp_call": _extract_mcp_call,
+    "mcp_approval_request": _extract_mcp_approval_request,
+}
 
 
 class OpenAIAdapterV2:
@@ -8,7 +190,9 @@ class OpenAIAdapterV2:
     Adaptador simple de OpenAI usando la nueva API responses.create()
     """
 
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-5-mini", instructions: str = ""):
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-5-mini", instructions: str = "",
+                 response_cache: Optional[LLMCache] = None, semantic_cache: Optional[SemanticCache] = None,
+                 embedding_model: str = "text-embedding-3-small"):
         """
         Inicializa el adaptador de OpenAI v2.
 
@@ -16,15 +200,55 @@ class OpenAIAdapterV2:
             api_key: Token de API de OpenAI. Si no se proporciona,
                     se busca en la variable de entorno OPENAI_API_KEY
             model: Modelo de OpenAI a utilizar
+            instructions: Instrucciones por defecto del modelo
+            response_cache: Cache de respuestas exactas (opcional, desactivada por defecto)
+            semantic_cache: Cache semántica para paráfrasis del mismo mensaje (opcional)
+            embedding_model: Modelo de embeddings usado por la cache semántica
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("Se requiere un token de API de OpenAI. Configure OPENAI_API_KEY en las variables de entorno.")
 
         self.model = model
-        self.client = OpenAI(api_key=self.api_key)
+        self.response_cache = response_cache
+        self.semantic_cache = semantic_cache
+        self.embedding_model = embedding_model
+        self._http = None
+        self._client = None
+        # Extracciones memoizadas por ID de respuesta (cada respuesta se recorre una vez)
+        self._extraction_cache = LLMCache(max_size=64, default_ttl=300)
         self.tools = []
         self.instructions = instructions
+        self._refresh_tools_payload()
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """
+        Cliente asíncrono de OpenAI sobre el pool compartido del event loop actual.
+
+        El pool queda ligado al event loop en el que se crea, así que hay uno
+        por loop, compartido entre instancias (los wrappers síncronos usan
+        siempre el mismo loop de fondo, así que su pool dura entre llamadas).
+        """
+        http = _shared_http_client()
+        if self._client is None or self._http is not http:
+            self._client = AsyncOpenAI(api_key=self.api_key, http_client=http)
+            self._http = http
+        return self._client
+
+    async def aclose(self):
+        """
+        Suelta las referencias de esta instancia al cliente. El pool es
+        compartido con las demás instancias del loop, así que no se cierra
+        (para eso está close_shared_http_client()).
+        """
+        self._http = None
+        self._client = None
+
+    async def _embed(self, text: str) -> List[float]:
+        """Obtiene el embedding de un texto para la cache semántica."""
+        response = await self.client.embeddings.create(model=self.embedding_model, input=text)
+        return response.data[0].embedding
 
     def add_mcp_tool(self, server_label: str, server_description: str, server_url: str, require_approval: str = "always", authorization: str = None, allowed_tools: list = None):
         """
@@ -51,10 +275,27 @@ class OpenAIAdapterV2:
             tool["allowed_tools"] = allowed_tools
 
         self.tools.append(tool)
+        self._refresh_tools_payload()
+
+    def _refresh_tools_payload(self):
+        """
+        Recalcula el payload de tools (y su JSON para las claves de cache).
+        Se llama solo desde __init__ y los métodos que modifican self.tools.
+        """
+        self._tools_payload = tuple(self.tools) or None
+        self._tools_payload_json = orjson.dumps(self.tools, option=orjson.OPT_SORT_KEYS).decode()
+
+    @property
+    def tools_payload(self) -> Optional[tuple]:
+        """Tools a enviar en responses.create (None si no hay), precalculadas."""
+        return self._tools_payload
 
     def _extract_response_content(self, response) -> Dict[str, Any]:
         """
         Extrae el contenido, tool calls y approval requests de la respuesta compleja de OpenAI.
+        Recorre response.output una sola vez despachando por tipo de item; el
+        resultado se memoiza por ID de respuesta, así que extraer de nuevo la
+        misma respuesta (p.ej. la final) no la vuelve a recorrer.
 
         Args:
             response: Objeto Response de OpenAI
@@ -62,57 +303,68 @@ class OpenAIAdapterV2:
         Returns:
             Diccionario con content, tool_calls y approval_requests extraídos
         """
-        content = ""
-        tool_calls = []
-        approval_requests = []
-
-        # Verificar si hay output en la respuesta
-        if hasattr(response, 'output') and response.output:
-            for item in response.output:
-                # Extraer contenido de texto de ResponseOutputMessage
-                if hasattr(item, 'type') and item.type == 'message':
-                    if hasattr(item, 'content') and item.content:
-                        for content_item in item.content:
-                            if hasattr(content_item, 'type') and content_item.type == 'output_text':
-                                if hasattr(content_item, 'text'):
-                                    content = content_item.text
-                                    break
-
-                # Extraer tool calls de McpCall
-                elif hasattr(item, 'type') and item.type == 'mcp_call':
-                    tool_call_info = {
-                        "id": getattr(item, 'id', ''),
-                        "name": getattr(item, 'name', ''),
-                        "server_label": getattr(item, 'server_label', ''),
-                        "arguments": getattr(item, 'arguments', ''),
-                        "success": item.error is None,
-                        "error": getattr(item.error, 'message', None) if item.error else None,
-                        "output": getattr(item, 'output', None)
-                    }
-                    tool_calls.append(tool_call_info)
-
-                # Extraer approval requests
-                elif hasattr(item, 'type') and item.type == 'mcp_approval_request':
-                    approval_request = {
-                        "id": getattr(item, 'id', ''),
-                        "type": getattr(item, 'type', ''),
-                        "name": getattr(item, 'name', ''),
-                        "server_label": getattr(item, 'server_label', ''),
-                        "arguments": getattr(item, 'arguments', '')
-                    }
-                    approval_requests.append(approval_request)
-
-        return {
-            "content": content,
-            "tool_calls": tool_calls,
-            "approval_requests": approval_requests
+        response_id = getattr(response, 'id', None)
+        if response_id is not None:
+            cached = self._extraction_cache.get(response_id)
+            if cached is not None:
+                return cached
+
+        extracted = {
+            "content": "",
+            "tool_calls": [],
+            "approval_requests": []
         }
 
-    def _handle_approval_requests(self, approval_requests: List[Dict[str, Any]], previous_response_id: str) -> Dict[str, Any]:
+        for item in getattr(response, 'output', None) or ():
+            handler = RESPONSE_ITEM_EXTRACTORS.get(getattr(item, 'type', None))
+            if handler is not None:
+                handler(item, extracted)
+
+        if response_id is not None:
+            self._extraction_cache.set(response_id, extracted)
+        return extracted
+
+    @staticmethod
+    def _merge_unique(new_calls: List[Dict[str, Any]], all_tool_calls: Optional[List[Dict[str, Any]]], seen_ids: set,
+                      counts: Dict[str, int], on_tool_call: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Registra los tool calls cuyo ID todavía no se vio: actualiza los
+        contadores, los pasa a on_tool_call y los agrega a all_tool_calls.
+
+        Args:
+            new_calls: Tool calls extraídos de una respuesta
+            all_tool_calls: Tool calls acumulados de la conversación (se modifica), o None para no acumularlos
+            seen_ids: IDs ya registrados (se modifica)
+            counts: Contadores "total" y "successful" de la conversación (se modifica)
+            on_tool_call: Callback llamado con cada tool call nuevo (opcional)
+
+        Returns:
+            Los tool calls nuevos
+        """
+        added = []
+        for tc in new_calls:
+            tc_id = tc.get("id")
+            if tc_id not in seen_ids:
+                seen_ids.add(tc_id)
+                added.append(tc)
+                counts["total"] += 1
+                counts["successful"] += bool(tc.get("success", False))
+                if on_tool_call is not None:
+                    on_tool_call(tc)
+        if all_tool_calls is not None:
+            all_tool_calls.extend(added)
+        return added
+
+    async def _handle_approval_requests_async(self, approval_requests: List[Dict[str, Any]], previous_response_id: str) -> Dict[str, Any]:
         """
         Maneja automáticamente las solicitudes de aprobación de MCP tools.
         Siempre aprueba todas las solicitudes.
 
+        Todas las approvals se responden en un único input sobre la misma
+        cadena de respuestas: si se respondieran en ramas paralelas desde
+        previous_response_id, solo una rama seguiría la conversación y las
+        salidas de las otras se perderían.
+
         Args:
             approval_requests: Lista de approval requests
             previous_response_id: ID de la respuesta anterior
@@ -124,54 +376,80 @@ class OpenAIAdapterV2:
             return None
 
         # Crear input con approvals automáticos
-        input_data = []
-        for request in approval_requests:
-            approval_response = {
+        input_data = [
+            {
                 "type": "mcp_approval_response",
                 "approve": True,  # Siempre aprobar
                 "approval_request_id": request["id"]
             }
-            input_data.append(approval_response)
+            for request in approval_requests
+        ]
 
         try:
             # Hacer nueva llamada con approvals
-            response = self.client.responses.create(
+            response = await self.client.responses.create(
                 instructions=self.instructions,
                 model=self.model,
-                tools=self.tools if self.tools else None,
+                tools=self.tools_payload,
                 previous_response_id=previous_response_id,
                 input=input_data,
             )
-
-            # Extraer contenido de la nueva respuesta
-            extracted = self._extract_response_content(response)
-
-            return {
-                "success": True,
-                "response": response,
-                "content": extracted["content"],
-                "tool_calls": extracted["tool_calls"],
-                "approval_requests": extracted["approval_requests"],
-                "approvals_processed": len(approval_requests)
-            }
-
         except Exception as e:
+            logger.error("❌ Error en llamada con approvals: %s", e)
             return {
                 "success": False,
                 "error": f"Error procesando approvals: {str(e)}",
                 "approvals_processed": 0
             }
 
-    def chat(self, message: str, system_prompt: Optional[str] = None, max_approval_iterations: int = 50, debug_duplicates: bool = True) -> Dict[str, Any]:
+        # Extraer contenido de la nueva respuesta
+        extracted = self._extract_response_content(response)
+
+        return {
+            "success": True,
+            "response": response,
+            "content": extracted["content"],
+            "tool_calls": extracted["tool_calls"],
+            "approval_requests": extracted["approval_requests"],
+            "approvals_processed": len(approval_requests)
+        }
+
+    def chat(self, message: str, system_prompt: Optional[str] = None, max_approval_iterations: int = 50, debug_duplicates: bool = True,
+             on_tool_call: Optional[Callable[[Dict[str, Any]], None]] = None, keep_history: bool = True) -> Dict[str, Any]:
         """
         Envía un mensaje usando la nueva API responses.create().
+        Wrapper síncrono de chat_async() para compatibilidad.
+
+        Args:
+            message: Mensaje del usuario
+            system_prompt: Prompt del sistema (opcional, sobreescribe self.instructions)
+            max_approval_iterations: Máximo número de iteraciones para procesar approvals
+            debug_duplicates: Si loguear (en DEBUG) el detalle de deduplicación (default: True)
+            on_tool_call: Callback llamado con cada tool call nuevo (ver chat_async)
+            keep_history: Si acumular los tool calls en el resultado (ver chat_async)
+
+        Returns:
+            Respuesta del modelo con posibles resultados de tools
+        """
+        return _run_sync(lambda: self.chat_async(
+            message, system_prompt, max_approval_iterations, debug_duplicates, on_tool_call, keep_history
+        ))
+
+    async def chat_async(self, message: str, system_prompt: Optional[str] = None, max_approval_iterations: int = 50, debug_duplicates: bool = True,
+                         on_tool_call: Optional[Callable[[Dict[str, Any]], None]] = None, keep_history: bool = True) -> Dict[str, Any]:
+        """
+        Envía un mensaje usando la nueva API responses.create() sin bloquear el event loop.
         Maneja automáticamente las solicitudes de aprobación de MCP tools.
 
         Args:
             message: Mensaje del usuario
             system_prompt: Prompt del sistema (opcional, sobreescribe self.instructions)
             max_approval_iterations: Máximo número de iteraciones para procesar approvals
-            debug_duplicates: Si mostrar logs detallados de deduplicación (default: True)
+            debug_duplicates: Si loguear (en DEBUG) el detalle de deduplicación (default: True)
+            on_tool_call: Callback llamado con cada tool call nuevo, a medida que se ejecutan
+            keep_history: Si acumular los tool calls en el resultado. Con False (y on_tool_call
+                    para consumirlos) la memoria no crece con la cantidad de tool calls;
+                    tool_stats se calcula igual con contadores
 
         Returns:
             Respuesta del modelo con posibles resultados de tools
@@ -179,126 +457,163 @@ class OpenAIAdapterV2:
         try:
             # Usar system_prompt si se proporciona, sino usar self.instructions
             instructions = system_prompt if system_prompt else self.instructions
+            # El detalle de deduplicación se formatea solo si alguien lo va a ver
+            debug = debug_duplicates and logger.isEnabledFor(logging.DEBUG)
+
+            # Cache exacta y semántica, antes de cualquier llamada a la API
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key = LLMCache.make_key(
+                    {"model": self.model, "instructions": instructions, "tools": self._tools_payload_json, "input": message},
+                    prefix="llm:v2:exact:"
+                )
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    logger.debug("⚡ Respuesta obtenida de cache")
+                    return dict(cached)
+
+            semantic_key = None
+            embedding = None
+            if self.semantic_cache is not None:
+                semantic_key = LLMCache.make_key(
+                    {"model": self.model, "instructions": instructions, "tools": self._tools_payload_json},
+                    prefix="llm:v2:semantic:"
+                )
+                try:
+                    embedding = await self._embed(message)
+                    cached = self.semantic_cache.get(semantic_key, embedding)
+                except Exception as e:
+                    # La cache es una optimización: si falla cuenta como miss y se sigue con el modelo
+                    logger.warning("⚠️ Cache semántica no disponible: %s", e)
+                    semantic_key = None
+                    cached = None
+                if cached is not None:
+                    logger.debug("⚡ Respuesta obtenida de cache semántica")
+                    return dict(cached)
 
             # Primera llamada
-            response = self.client.responses.create(
+            response = await self.client.responses.create(
                 instructions=instructions,
                 model=self.model,
-                tools=self.tools if self.tools else None,
+                tools=self.tools_payload,
                 input=message,
             )
 
+            # Sin tools no puede haber tool calls ni approvals: no hace falta el loop
+            if self._tools_payload is None:
+                result = {
+                    "success": True,
+                    "response": response,
+                    "content": self._extract_response_content(response)["content"],
+                    "tool_calls": [],
+                    "tool_stats": self._tool_stats(0, 0),
+                    "response_id": getattr(response, 'id', None),
+                    "status": getattr(response, 'status', None),
+                    "usage": getattr(response, 'usage', None),
+                    "approval_iterations": 0,
+                    "total_approvals_processed": 0,
+                }
+                self._cache_result(cache_key, semantic_key, embedding, result)
+                return result
+
             # Procesar approvals automáticamente si es necesario
             all_tool_calls = []
+            history = all_tool_calls if keep_history else None
+            seen_ids = set()
+            counts = {"total": 0, "successful": 0}
             approval_iterations = 0
             total_approvals_processed = 0
+            prev_approval_ids = frozenset()
 
             current_response = response
             while approval_iterations < max_approval_iterations:
                 # Extraer contenido de la respuesta actual
                 extracted = self._extract_response_content(current_response)
 
-                # DEBUG: Mostrar tool calls encontrados en esta iteración
-                if debug_duplicates and extracted["tool_calls"]:
-                    print(f"\n🔧 DEBUG - Iteración {approval_iterations}: Encontrados {len(extracted['tool_calls'])} tool calls")
-                    for i, tc in enumerate(extracted["tool_calls"]):
-                        tc_id = tc.get("id", "unknown")
-                        tc_name = tc.get("name", "unknown")
-                        print(f"   Tool {i+1}: {tc_name} (ID: {tc_id})")
-
-                # Agregar tool calls encontrados (SOLO si no están duplicados)
-                # Verificar duplicados por ID
-                existing_ids = {tc.get("id") for tc in all_tool_calls}
-                new_tool_calls = [tc for tc in extracted["tool_calls"] if tc.get("id") not in existing_ids]
-                
-                if new_tool_calls:
-                    if debug_duplicates:
-                        print(f"   ➕ Agregando {len(new_tool_calls)} tool calls nuevos")
-                    all_tool_calls.extend(new_tool_calls)
-                else:
-                    if debug_duplicates:
-                        if extracted["tool_calls"]:
-                            print(f"   ⚠️  DUPLICADOS DETECTADOS: {len(extracted['tool_calls'])} tool calls ya existían")
-                        else:
-                            print(f"   ℹ️  No hay tool calls en esta iteración")
+                if debug and extracted["tool_calls"]:
+                    logger.debug("🔧 Iteración %d: encontrados %d tool calls", approval_iterations, len(extracted["tool_calls"]))
+                    for i, tc in enumerate(extracted["tool_calls"], 1):
+                        logger.debug("   Tool %d: %s (ID: %s)", i, tc.get("name", "unknown"), tc.get("id", "unknown"))
+
+                # Agregar tool calls encontrados (SOLO si no están duplicados por ID)
+                new_tool_calls = self._merge_unique(extracted["tool_calls"], history, seen_ids, counts, on_tool_call)
+
+                if debug:
+                    if new_tool_calls:
+                        logger.debug("   ➕ Agregando %d tool calls nuevos", len(new_tool_calls))
+                    elif extracted["tool_calls"]:
+                        logger.debug("   ⚠️ Duplicados detectados: %d tool calls ya existían", len(extracted["tool_calls"]))
+                    else:
+                        logger.debug("   ℹ️ No hay tool calls en esta iteración")
 
                 # Verificar si hay approval requests
                 if extracted["approval_requests"]:
+                    # Si el modelo vuelve a pedir exactamente las mismas approvals, el loop no avanza
+                    approval_ids = frozenset(req["id"] for req in extracted["approval_requests"])
+                    if approval_ids == prev_approval_ids:
+                        logger.warning("⚠️ Approvals repetidas sin progreso (%d), se corta el loop", len(approval_ids))
+                        break
+                    prev_approval_ids = approval_ids
+
                     approval_iterations += 1
                     total_approvals_processed += len(extracted["approval_requests"])
 
                     # Mostrar approval requests (parámetros que el LLM quiere enviar)
-                    print(f"\n🔍 APPROVAL REQUESTS ({len(extracted['approval_requests'])} herramientas):")
-                    for i, req in enumerate(extracted["approval_requests"], 1):
-                        print(f"   {i}. 🛠️  Herramienta: {req.get('name', 'unknown')}")
-                        print(f"      📡 Servidor: {req.get('server_label', 'unknown')}")
-                        print(f"      📋 Argumentos: {req.get('arguments', 'N/A')}")
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info("🔍 Approval requests (%d herramientas):", len(extracted["approval_requests"]))
+                        for i, req in enumerate(extracted["approval_requests"], 1):
+                            logger.info(
+                                "   %d. 🛠️ %s (📡 %s) 📋 %s",
+                                i, req.get("name", "unknown"), req.get("server_label", "unknown"), req.get("arguments", "N/A")
+                            )
 
                     # Procesar approvals
-                    approval_result = self._handle_approval_requests(
+                    approval_result = await self._handle_approval_requests_async(
                         extracted["approval_requests"],
                         getattr(current_response, 'id', None)
                     )
-                    # Mostrar resultados detallados de la ejecución
+
                     if approval_result and approval_result["success"]:
-                        print(f"\n📊 RESULTADOS DE EJECUCIÓN:")
-                        tool_calls = approval_result.get("tool_calls", [])
-                        
-                        for i, tc in enumerate(tool_calls, 1):
-                            status_icon = "✅" if tc.get("success", False) else "❌"
-                            tool_name = tc.get("name", "unknown")
-                            server = tc.get("server_label", "unknown")
-                            
-                            print(f"   {i}. {status_icon} {tool_name} ({server})")
-                            
-                            if tc.get("success", False):
-                                output = tc.get("output", "")
-                                if output:
-                                    # Mostrar solo un preview del output si es muy largo
-                                    output_preview = str(output)[:100] + "..." if len(str(output)) > 100 else str(output)
-                                    print(f"      📤 Output: {output_preview}")
+                        approval_tool_calls = approval_result.get("tool_calls", [])
+
+                        # Mostrar resultados detallados de la ejecución
+                        if logger.isEnabledFor(logging.INFO):
+                            logger.info("📊 Resultados de ejecución:")
+                            for i, tc in enumerate(approval_tool_calls, 1):
+                                status_icon = "✅" if tc.get("success", False) else "❌"
+                                logger.info("   %d. %s %s (%s)", i, status_icon, tc.get("name", "unknown"), tc.get("server_label", "unknown"))
+
+                                if tc.get("success", False):
+                                    logger.info("      📤 Output: %s", _output_preview(tc.get("output")))
                                 else:
-                                    print(f"      📤 Output: (vacío)")
-                            else:
-                                error = tc.get("error", "Error desconocido")
-                                print(f"      ⚠️  Error: {error}")
-                        
-                        approvals_count = approval_result.get("approvals_processed", 0)
-                        successful_count = sum(1 for tc in tool_calls if tc.get("success", False))
-                        print(f"\n📈 Resumen: {successful_count}/{len(tool_calls)} herramientas exitosas")
-                    else:
-                        error_msg = approval_result.get("error", "Error desconocido") if approval_result else "Sin resultado"
-                        print(f"❌ Error procesando approvals: {error_msg}")
+                                    logger.info("      ⚠️ Error: %s", tc.get("error", "Error desconocido"))
+
+                            successful_count = sum(1 for tc in approval_tool_calls if tc.get("success", False))
+                            logger.info("📈 Resumen: %d/%d herramientas exitosas", successful_count, len(approval_tool_calls))
 
-                    if approval_result and approval_result["success"]:
                         current_response = approval_result["response"]
-                        
-                        # DEBUG: Mostrar tool calls del approval result
-                        approval_tool_calls = approval_result.get("tool_calls", [])
-                        if debug_duplicates and approval_tool_calls:
-                            print(f"\n🔧 DEBUG - Approval result: {len(approval_tool_calls)} tool calls")
-                            for i, tc in enumerate(approval_tool_calls):
-                                tc_id = tc.get("id", "unknown")
-                                tc_name = tc.get("name", "unknown")
-                                print(f"   Approval Tool {i+1}: {tc_name} (ID: {tc_id})")
-                        
+
+                        if debug and approval_tool_calls:
+                            logger.debug("🔧 Approval result: %d tool calls", len(approval_tool_calls))
+                            for i, tc in enumerate(approval_tool_calls, 1):
+                                logger.debug("   Approval Tool %d: %s (ID: %s)", i, tc.get("name", "unknown"), tc.get("id", "unknown"))
+
                         # Agregar tool calls del approval processing (SOLO si no están duplicados)
-                        existing_ids = {tc.get("id") for tc in all_tool_calls}
-                        new_approval_calls = [tc for tc in approval_tool_calls if tc.get("id") not in existing_ids]
-                        
-                        if new_approval_calls:
-                            if debug_duplicates:
-                                print(f"   ➕ Agregando {len(new_approval_calls)} approval tool calls nuevos")
-                            all_tool_calls.extend(new_approval_calls)
-                        else:
-                            if debug_duplicates and approval_tool_calls:
-                                print(f"   ⚠️  DUPLICADOS DETECTADOS en approval: {len(approval_tool_calls)} tool calls ya existían")
+                        new_approval_calls = self._merge_unique(approval_tool_calls, history, seen_ids, counts, on_tool_call)
+
+                        if debug:
+                            if new_approval_calls:
+                                logger.debug("   ➕ Agregando %d approval tool calls nuevos", len(new_approval_calls))
+                            elif approval_tool_calls:
+                                logger.debug("   ⚠️ Duplicados detectados en approval: %d tool calls ya existían", len(approval_tool_calls))
 
                         # Si no hay más approvals en esta respuesta, salir del loop
                         if not approval_result["approval_requests"]:
                             break
                     else:
                         # Error procesando approvals
+                        error_msg = approval_result.get("error", "Error desconocido") if approval_result else "Sin resultado"
+                        logger.error("❌ Error procesando approvals: %s", error_msg)
                         break
                 else:
                     # No hay más approvals, salir del loop
@@ -307,55 +622,42 @@ class OpenAIAdapterV2:
             # Extraer contenido final
             final_extracted = self._extract_response_content(current_response)
 
-            # DEBUG: Mostrar tool calls finales
             final_tool_calls = final_extracted.get("tool_calls", [])
-            if debug_duplicates and final_tool_calls:
-                print(f"\n🔧 DEBUG - Respuesta final: {len(final_tool_calls)} tool calls")
-                for i, tc in enumerate(final_tool_calls):
-                    tc_id = tc.get("id", "unknown")
-                    tc_name = tc.get("name", "unknown")
-                    print(f"   Final Tool {i+1}: {tc_name} (ID: {tc_id})")
+            if debug and final_tool_calls:
+                logger.debug("🔧 Respuesta final: %d tool calls", len(final_tool_calls))
+                for i, tc in enumerate(final_tool_calls, 1):
+                    logger.debug("   Final Tool %d: %s (ID: %s)", i, tc.get("name", "unknown"), tc.get("id", "unknown"))
 
             # Combinar tool calls finales (SOLO si no están duplicados)
-            existing_ids = {tc.get("id") for tc in all_tool_calls}
-            new_final_calls = [tc for tc in final_tool_calls if tc.get("id") not in existing_ids]
-            
-            if new_final_calls:
-                if debug_duplicates:
-                    print(f"   ➕ Agregando {len(new_final_calls)} tool calls finales nuevos")
-                all_tool_calls.extend(new_final_calls)
-            else:
-                if debug_duplicates and final_tool_calls:
-                    print(f"   ⚠️  DUPLICADOS DETECTADOS en respuesta final: {len(final_tool_calls)} tool calls ya existían")
+            new_final_calls = self._merge_unique(final_tool_calls, history, seen_ids, counts, on_tool_call)
+
+            if debug:
+                if new_final_calls:
+                    logger.debug("   ➕ Agregando %d tool calls finales nuevos", len(new_final_calls))
+                elif final_tool_calls:
+                    logger.debug("   ⚠️ Duplicados detectados en respuesta final: %d tool calls ya existían", len(final_tool_calls))
+                logger.debug("📊 Resumen de deduplicación: %d tool calls únicos procesados", counts["total"])
 
             # Obtener estadísticas de tool calls únicos
-            tool_stats = self.get_tool_call_stats(all_tool_calls)
-            if debug_duplicates:
-                print(f"\n📊 RESUMEN DE DEDUPLICACIÓN: {len(all_tool_calls)} tool calls únicos procesados")
+            tool_stats = self._tool_stats(counts["total"], counts["successful"])
 
             # Usar el contenido de la respuesta final
             final_content = final_extracted["content"] if final_extracted["content"] else extracted["content"]
 
-            # Print resumen final completo para demo
-            print(f"\n🎯 CONVERSACIÓN COMPLETADA")
-            print(f"   🔄 Iteraciones de approval: {approval_iterations}")
-            print(f"   📊 Total tool calls: {len(all_tool_calls)}")
-            
-            if tool_stats["total"] > 0:
-                print(f"   📈 Éxito: {tool_stats['successful']}/{tool_stats['total']} ({tool_stats['success_rate']}%)")
-                
-                # Mostrar herramientas que fallaron (si las hay)
-                failed_tools = [tc for tc in all_tool_calls if not tc.get("success", True)]
-                if failed_tools:
-                    print(f"   ⚠️  Herramientas fallidas:")
-                    for failed in failed_tools:
-                        tool_name = failed.get("name", "unknown")
-                        error = failed.get("error", "Error desconocido")
-                        print(f"      • {tool_name}: {error}")
-            else:
-                print(f"   ℹ️  No se ejecutaron herramientas")
+            # Resumen final de la conversación
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "🎯 Conversación completada: %d iteraciones de approval, %d tool calls",
+                    approval_iterations, counts["total"]
+                )
+                if tool_stats["total"] > 0:
+                    logger.info("   📈 Éxito: %d/%d (%s%%)", tool_stats["successful"], tool_stats["total"], tool_stats["success_rate"])
+                    for failed in self.get_failed_tool_calls(all_tool_calls):
+                        logger.info("   ⚠️ Herramienta fallida: %s: %s", failed.get("name", "unknown"), failed.get("error", "Error desconocido"))
+                else:
+                    logger.info("   ℹ️ No se ejecutaron herramientas")
 
-            return {
+            result = {
                 "success": True,
                 "response": current_response,
                 "content": final_content,
@@ -369,13 +671,159 @@ class OpenAIAdapterV2:
                 "total_approvals_processed": total_approvals_processed,
             }
 
+            # Solo se cachean respuestas sin tool calls: las tools MCP tienen efectos
+            # (crear páginas, issues...) que una respuesta cacheada no repetiría
+            if not counts["total"] and not total_approvals_processed:
+                self._cache_result(cache_key, semantic_key, embedding, result)
+
+            return result
+
         except Exception as e:
+            logger.exception("❌ Error en conversación: %s", e)
             return {
                 "success": False,
                 "error": str(e),
                 "response": None,
             }
 
+    def _cache_result(self, cache_key: Optional[str], semantic_key: Optional[str], embedding: Optional[List[float]],
+                      result: Dict[str, Any]):
+        """Guarda el resultado de un chat en las caches que estén activas para el request."""
+        if cache_key is not None:
+            self.response_cache.set(cache_key, result)
+        if semantic_key is not None:
+            self.semantic_cache.set(semantic_key, embedding, result)
+
+    def chat_batch(self, messages: List[str], output_jsonl: Optional[str] = None, poll_interval: float = 5.0,
+                   max_poll_interval: float = 300.0) -> List[Dict[str, Any]]:
+        """
+        Envía varios mensajes por la Batch API y espera sus respuestas.
+        Wrapper síncrono de chat_batch_async() (ver ahí los detalles).
+        """
+        return _run_sync(lambda: self.chat_batch_async(messages, output_jsonl, poll_interval, max_poll_interval))
+
+    async def chat_batch_async(self, messages: List[str], output_jsonl: Optional[str] = None, poll_interval: float = 5.0,
+                               max_poll_interval: float = 300.0) -> List[Dict[str, Any]]:
+        """
+        Envía varios mensajes por la Batch API (/v1/responses): 50% más barata y
+        sin límite de RPM, pero con ventana de 24h. Pensado para cargas no
+        interactivas (enriquecimiento de datos, evals).
+
+        Dentro de un batch no se pueden responder approvals de MCP: los approval
+        requests se devuelven sin procesar en cada resultado.
+
+        Args:
+            messages: Mensajes del usuario, uno por request
+            output_jsonl: Ruta donde guardar el output del batch, sin las tools (opcional)
+            poll_interval: Segundos de espera inicial entre consultas de estado
+            max_poll_interval: Tope del backoff exponencial entre consultas
+
+        Returns:
+            Un resultado por mensaje, en el mismo orden que messages
+        """
+        if not messages:
+            return []
+
+        payload = b"".join(
+            orjson.dumps(
+                {
+                    "custom_id": f"req-{i}",
+                    "method": "POST",
+                    "url": "/v1/responses",
+                    "body": {
+                        "model": self.model,
+                        "instructions": self.instructions,
+                        "input": message,
+                        "tools": self.tools_payload,
+                    }
+                },
+                option=orjson.OPT_APPEND_NEWLINE
+            )
+            for i, message in enumerate(messages)
+        )
+
+        # El payload se sube desde memoria: las tools MCP llevan los tokens de
+        # Notion/GitHub del usuario en "authorization" y no deben quedar en disco
+        input_name = f"responses-{uuid.uuid4().hex[:8]}.jsonl"
+        batch_file = await self.client.files.create(file=(input_name, payload), purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/responses",
+            completion_window="24h"
+        )
+        logger.info("📦 Batch creado: %s (%d requests, %s)", batch.id, len(messages), input_name)
+
+        delay = poll_interval
+        while batch.status not in BATCH_TERMINAL_STATUSES:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_poll_interval)
+            batch = await self.client.batches.retrieve(batch.id)
+            logger.debug("⏳ Batch %s: %s", batch.id, batch.status)
+        logger.info("📦 Batch %s terminado: %s", batch.id, batch.status)
+
+        # Un batch expirado o cancelado puede tener output parcial
+        output = b""
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                output += (await self.client.files.content(file_id)).content
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+        saved_lines = []
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            try:
+                item = orjson.loads(line)
+                index = int(item["custom_id"].split("-", 1)[1])
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                logger.error("❌ Línea de output de batch %s ilegible: %s", batch.id, e)
+                continue
+
+            if output_jsonl:
+                # La respuesta repite las tools del request (con su authorization): no se guardan
+                saved = orjson.loads(line)
+                ((saved.get("response") or {}).get("body") or {}).pop("tools", None)
+                saved_lines.append(orjson.dumps(saved, option=orjson.OPT_APPEND_NEWLINE))
+            if not 0 <= index < len(messages):
+                logger.error("❌ custom_id fuera de rango en batch %s: %s", batch.id, item["custom_id"])
+                continue
+
+            response = item.get("response") or {}
+            body = response.get("body") or {}
+
+            if response.get("status_code") != 200 or item.get("error"):
+                error = item.get("error") or body.get("error") or {}
+                results[index] = {"success": False, "error": error.get("message", "Error desconocido"), "response": None}
+                continue
+
+            try:
+                extracted = self._extract_response_content(Response.model_validate(body))
+            except Exception as e:
+                # Una respuesta que no valida solo invalida su propio request, no el batch entero
+                logger.error("❌ Respuesta inválida para %s en batch %s: %s", item["custom_id"], batch.id, e)
+                results[index] = {"success": False, "error": f"Respuesta inválida: {e}", "response": None}
+                continue
+
+            results[index] = {
+                "success": True,
+                "content": extracted["content"],
+                "tool_calls": extracted["tool_calls"],
+                "tool_stats": self.get_tool_call_stats(extracted["tool_calls"]),
+                "approval_requests": extracted["approval_requests"],
+                "response_id": body.get("id"),
+                "status": body.get("status"),
+                "usage": body.get("usage"),
+            }
+
+        if output_jsonl:
+            with open(output_jsonl, "wb") as f:
+                f.writelines(saved_lines)
+
+        return [
+            result if result is not None else {"success": False, "error": f"Sin resultado (batch {batch.status})", "response": None}
+            for result in results
+        ]
+
     def get_tool_call_stats(self, tool_calls: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Obtiene estadísticas de los tool calls ejecutados.
@@ -386,19 +834,20 @@ class OpenAIAdapterV2:
         Returns:
             Estadísticas de tool calls
         """
-        if not tool_calls:
-            return {"total": 0, "successful": 0, "failed": 0, "success_rate": 0.0}
-
-        total = len(tool_calls)
         successful = sum(1 for call in tool_calls if call.get("success", False))
-        failed = total - successful
-        success_rate = (successful / total) * 100 if total > 0 else 0.0
+        return self._tool_stats(len(tool_calls), successful)
+
+    @staticmethod
+    def _tool_stats(total: int, successful: int) -> Dict[str, Any]:
+        """Arma las estadísticas de tool calls a partir de los contadores."""
+        if not total:
+            return {"total": 0, "successful": 0, "failed": 0, "success_rate": 0.0}
 
         return {
             "total": total,
             "successful": successful,
-            "failed": failed,
-            "success_rate": round(success_rate, 2)
+            "failed": total - successful,
+            "success_rate": round((successful / total) * 100, 2)
         }
 
     def get_failed_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -416,3 +865,4 @@ class OpenAIAdapterV2:
     def clear_tools(self):
         """Limpia todas las tools configuradas."""
         self.tools = []
+        self._refresh_tools_payload()
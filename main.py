@@ -1,3 +1,5 @@
+import logging
+import os
 from fastapi import FastAPI
 from dotenv import load_dotenv
 
@@ -7,6 +9,7 @@ from orchestration.routes import router as orchestration_router
 from notion_module.routes import router as notion_router
 from slack_module.routes import router as slack_router
 from stats.routes import router as stats_router
+from notion_module.utils import close_notion_client
 from database import init_db
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -17,6 +20,16 @@ origins = [
 
 load_dotenv()
 
+# --- Logging ---
+# Un LOG_LEVEL inválido no debe impedir que arranque la app: se usa INFO
+log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+if log_level not in logging.getLevelNamesMapping():
+    log_level = "INFO"
+logging.basicConfig(
+    level=log_level,
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s"
+)
+
 # --- Inicializar Base de Datos ---
 init_db()
 
@@ -42,6 +55,12 @@ app.include_router(slack_router)
 app.include_router(stats_router)
 
 
+@app.on_event("shutdown")
+async def shutdown_http_clients():
+    """Cierra los clientes HTTP compartidos al apagar la aplicación"""
+    await close_notion_client()
+
+
 @app.get("/")
 def read_root():
     """Endpoint raíz"""
@@ -1,3 +1,4 @@
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
@@ -9,6 +10,8 @@ from database import get_db
 from notion_module.models import get_notion_databases_for_user, get_notion_database_by_external_id, create_notion_database_resource
 from notion_module.utils import get_notion_databases, get_notion_database_details
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/notion", tags=["Notion"])
 
 
@@ -145,7 +148,7 @@ def save_notion_database(
             "database_url": database.database_url
         })
 
-        print(f"✅ Database de Notion guardada: {new_database.name} (Usuario: {current_user.username})")
+        logger.info("✅ Database de Notion guardada: %s (Usuario: %s)", new_database.name, current_user.username)
 
         return new_database.to_dict()
     except ValueError as e:
@@ -183,7 +186,7 @@ def delete_saved_database(
     database.is_active = False
     db.commit()
 
-    print(f"✅ Database de Notion desactivada: {database.name} (Usuario: {current_user.username})")
+    logger.info("✅ Database de Notion desactivada: %s (Usuario: %s)", database.name, current_user.username)
 
     return {
         "message": "Database eliminada exitosamente"
@@ -1,8 +1,220 @@
+import asyncio
+import time
 import httpx
-from typing import List, Dict, Optional
+from typing import Any, Awaitable, Callable, List, Dict, Optional, Tuple
 from fastapi import HTTPException, status
 
 
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+NOTION_REQUESTS_PER_SECOND = 3
+NOTION_MAX_RATE_LIMIT_RETRIES = 3
+
+# Cliente HTTP compartido (uno por event loop) para reutilizar conexiones con Notion
+_notion_client: Optional[httpx.AsyncClient] = None
+_notion_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Un rate limiter por token: el límite de Notion es por integración
+_rate_limiters: Dict[str, "_AsyncRateLimiter"] = {}
+
+# Requests en vuelo, para que llamadas idénticas concurrentes compartan un solo round-trip
+_inflight_requests: Dict[tuple, asyncio.Future] = {}
+
+# Cache con TTL de respuestas de Notion que cambian poco: clave -> (timestamp, valor)
+_response_cache: Dict[tuple, Tuple[float, Any]] = {}
+_RESPONSE_CACHE_MAX_SIZE = 512
+DATABASE_DETAILS_TTL_SECONDS = 30
+DATABASE_SEARCH_TTL_SECONDS = 10
+
+
+def get_notion_client() -> httpx.AsyncClient:
+    """
+    Obtiene el cliente HTTP compartido para la API de Notion.
+
+    Mantiene un pool de conexiones keep-alive (HTTP/2, multiplexando requests
+    concurrentes sobre una misma conexión) para evitar un handshake TLS por
+    cada request. Se crea uno nuevo si cambia el event loop.
+
+    Returns:
+        Cliente httpx asíncrono con pool de conexiones
+    """
+    global _notion_client, _notion_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _notion_client is None or _notion_client.is_closed or _notion_client_loop is not loop:
+        _notion_client = httpx.AsyncClient(
+            base_url=NOTION_API_URL,
+            headers={"Notion-Version": NOTION_VERSION},
+            http2=True,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=75),
+            timeout=30.0
+        )
+        _notion_client_loop = loop
+
+    return _notion_client
+
+
+async def close_notion_client():
+    """Cierra el cliente HTTP compartido de Notion."""
+    global _notion_client, _notion_client_loop
+
+    if _notion_client is not None and not _notion_client.is_closed:
+        await _notion_client.aclose()
+    _notion_client = None
+    _notion_client_loop = None
+
+
+class _AsyncRateLimiter:
+    """
+    Token bucket asíncrono: permite como máximo `rate` requests por `period` segundos,
+    dejando pasar ráfagas de hasta `rate` requests.
+    """
+
+    def __init__(self, rate: float, period: float = 1.0):
+        self.rate = rate
+        self.period = period
+        self._tokens = rate
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        """Bloquea el bucket durante `seconds` (ej: tras un 429 de Notion)."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    async def acquire(self):
+        """Espera hasta que haya un token disponible y lo consume."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+
+                elapsed = now - self._updated_at
+                self._tokens = min(self.rate, self._tokens + elapsed * self.rate / self.period)
+                self._updated_at = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+def _get_rate_limiter(notion_token: str) -> _AsyncRateLimiter:
+    """Obtiene (o crea) el rate limiter asociado a un token de Notion."""
+    limiter = _rate_limiters.get(notion_token)
+    if limiter is None:
+        limiter = _AsyncRateLimiter(NOTION_REQUESTS_PER_SECOND)
+        _rate_limiters[notion_token] = limiter
+    return limiter
+
+
+async def _notion_request(method: str, url: str, notion_token: str, **kwargs) -> httpx.Response:
+    """
+    Hace un request a la API de Notion respetando el rate limit del token.
+
+    Si Notion responde 429, pausa el rate limiter del token durante el
+    Retry-After indicado (así no insisten los demás requests concurrentes)
+    y reintenta hasta NOTION_MAX_RATE_LIMIT_RETRIES veces.
+
+    Args:
+        method: Método HTTP
+        url: Path relativo a la API de Notion (ej: "/search")
+        notion_token: Token de integración de Notion
+        **kwargs: Argumentos adicionales para httpx
+
+    Returns:
+        Respuesta de httpx
+    """
+    limiter = _get_rate_limiter(notion_token)
+
+    for attempt in range(NOTION_MAX_RATE_LIMIT_RETRIES + 1):
+        async with limiter:
+            response = await get_notion_client().request(method, url, **kwargs)
+
+        if response.status_code != 429 or attempt == NOTION_MAX_RATE_LIMIT_RETRIES:
+            return response
+
+        try:
+            retry_after = float(response.headers.get("Retry-After", 1))
+        except ValueError:
+            retry_after = 1.0
+        limiter.pause(retry_after)
+
+    return response
+
+
+async def _coalesce(key: tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Deduplica requests idénticos en vuelo.
+
+    Si ya hay un request pendiente con la misma clave, espera su resultado
+    en lugar de volver a llamar a Notion.
+
+    Args:
+        key: Clave que identifica el request
+        fetch: Función que lanza el request real
+
+    Returns:
+        Resultado del request (compartido entre todos los que lo esperan)
+    """
+    pending = _inflight_requests.get(key)
+    if pending is None:
+        pending = asyncio.ensure_future(fetch())
+        _inflight_requests[key] = pending
+        pending.add_done_callback(lambda _: _inflight_requests.pop(key, None))
+
+    # shield: si un llamador se cancela, el request sigue para los demás
+    return await asyncio.shield(pending)
+
+
+def _get_cached(key: tuple, ttl: float) -> Optional[Any]:
+    """Devuelve el valor cacheado si no expiró, o None."""
+    entry = _response_cache.get(key)
+    if entry is None:
+        return None
+
+    timestamp, value = entry
+    if time.monotonic() - timestamp >= ttl:
+        _response_cache.pop(key, None)
+        return None
+    return value
+
+
+def _set_cached(key: tuple, value: Any):
+    """Guarda un valor en la cache, descartando la entrada más antigua si está llena."""
+    if len(_response_cache) >= _RESPONSE_CACHE_MAX_SIZE:
+        oldest_key = min(_response_cache, key=lambda k: _response_cache[k][0])
+        _response_cache.pop(oldest_key, None)
+    _response_cache[key] = (time.monotonic(), value)
+
+
+def _extract_title(title_parts: Optional[List[Dict]]) -> str:
+    """
+    Extrae el texto plano de un título rich_text de Notion.
+
+    Args:
+        title_parts: Lista de fragmentos rich_text del título
+
+    Returns:
+        Título completo, o "Sin título" si está vacío
+    """
+    if not title_parts:
+        return "Sin título"
+
+    return "".join(part.get("plain_text", "") for part in title_parts) or "Sin título"
+
+
 async def get_notion_databases(notion_token: str) -> List[Dict]:
     """
     Obtiene todas las databases de Notion disponibles para el usuario.
@@ -21,29 +233,53 @@ async def get_notion_databases(notion_token: str) -> List[Dict]:
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Token de Notion no configurado. Configure su token primero."
         )
-    
+
+    cache_key = ("search_databases", notion_token)
+    cached = _get_cached(cache_key, DATABASE_SEARCH_TTL_SECONDS)
+    if cached is not None:
+        return cached
+
+    databases = await _coalesce(cache_key, lambda: _search_notion_databases(notion_token))
+    _set_cached(cache_key, databases)
+
+    return databases
+
+
+async def _search_notion_databases(notion_token: str) -> List[Dict]:
+    """Busca todas las databases del token en Notion, recorriendo la paginación."""
     headers = {
         "Authorization": f"Bearer {notion_token}",
-        "Notion-Version": "2022-06-28",
         "Content-Type": "application/json"
     }
     
-    async with httpx.AsyncClient() as client:
+    results = []
+    cursor = None
+
+    # Notion pagina la búsqueda (máximo 100 por página); seguir next_cursor hasta el final
+    while True:
+        payload = {
+            "filter": {
+                "property": "object",
+                "value": "database"
+            },
+            "sort": {
+                "direction": "descending",
+                "timestamp": "last_edited_time"
+            },
+            "page_size": 100
+        }
+
+        if cursor:
+            payload["start_cursor"] = cursor
+
         try:
             # Buscar todas las databases
-            response = await client.post(
-                "https://api.notion.com/v1/search",
+            response = await _notion_request(
+                "POST",
+                "/search",
+                notion_token,
                 headers=headers,
-                json={
-                    "filter": {
-                        "property": "object",
-                        "value": "database"
-                    },
-                    "sort": {
-                        "direction": "descending",
-                        "timestamp": "last_edited_time"
-                    }
-                },
+                json=payload,
                 timeout=30.0
             )
             response.raise_for_status()
@@ -65,20 +301,19 @@ async def get_notion_databases(notion_token: str) -> List[Dict]:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error de red al comunicarse con Notion: {str(e)}"
             )
+
+        results.extend(data.get("results", []))
+
+        cursor = data.get("next_cursor")
+        if not data.get("has_more") or not cursor:
+            break
     
     # Procesar resultados
     databases = []
-    for db in data.get("results", []):
-        # Extraer el título de la database
-        title = "Sin título"
-        if db.get("title"):
-            title_parts = db["title"]
-            if title_parts and len(title_parts) > 0:
-                title = title_parts[0].get("plain_text", "Sin título")
-        
+    for db in results:
         databases.append({
             "notion_database_id": db.get("id"),
-            "database_name": title,
+            "database_name": _extract_title(db.get("title")),
             "database_url": db.get("url"),
             "created_time": db.get("created_time"),
             "last_edited_time": db.get("last_edited_time"),
@@ -106,48 +341,57 @@ async def get_notion_database_details(notion_token: str, database_id: str) -> Di
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Token de Notion no configurado"
         )
-    
+
+    cache_key = ("database", notion_token, database_id)
+    cached = _get_cached(cache_key, DATABASE_DETAILS_TTL_SECONDS)
+    if cached is not None:
+        return cached
+
+    database = await _coalesce(
+        cache_key,
+        lambda: _fetch_notion_database_details(notion_token, database_id)
+    )
+    _set_cached(cache_key, database)
+
+    return database
+
+
+async def _fetch_notion_database_details(notion_token: str, database_id: str) -> Dict:
+    """Hace el request de detalles de una database a Notion."""
     headers = {
         "Authorization": f"Bearer {notion_token}",
-        "Notion-Version": "2022-06-28",
     }
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"https://api.notion.com/v1/databases/{database_id}",
-                headers=headers,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Database de Notion no encontrada"
-                )
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Error al obtener detalles de la database"
-            )
-        except httpx.HTTPError as e:
+    try:
+        response = await _notion_request(
+            "GET",
+            f"/databases/{database_id}",
+            notion_token,
+            headers=headers,
+            timeout=30.0
+        )
+        response.raise_for_status()
+        data = response.json()
+        
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error de red: {str(e)}"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Database de Notion no encontrada"
             )
-    
-    # Extraer el título
-    title = "Sin título"
-    if data.get("title"):
-        title_parts = data["title"]
-        if title_parts and len(title_parts) > 0:
-            title = title_parts[0].get("plain_text", "Sin título")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Error al obtener detalles de la database"
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error de red: {str(e)}"
+        )
     
     return {
         "notion_database_id": data.get("id"),
-        "database_name": title,
+        "database_name": _extract_title(data.get("title")),
         "database_url": data.get("url"),
         "created_time": data.get("created_time"),
         "last_edited_time": data.get("last_edited_time"),
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("openai")
+pytest.importorskip("orjson")
+
+from openai import AsyncOpenAI
+
+from adapters.openai_adapter_v2 import OrjsonAsyncHttpxClient
+
+
+FILE_OBJECT = {
+    "id": "file-test",
+    "object": "file",
+    "bytes": 3,
+    "created_at": 0,
+    "filename": "requests.jsonl",
+    "purpose": "batch",
+    "status": "processed",
+}
+
+
+def _capture(requests):
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=FILE_OBJECT)
+    return handler
+
+
+def test_files_create_se_envia_como_multipart():
+    requests = []
+
+    async def upload():
+        http = OrjsonAsyncHttpxClient(transport=httpx.MockTransport(_capture(requests)))
+        client = AsyncOpenAI(api_key="test", http_client=http)
+        try:
+            return await client.files.create(file=("requests.jsonl", b"{}\n"), purpose="batch")
+        finally:
+            await http.aclose()
+
+    uploaded = asyncio.run(upload())
+
+    assert uploaded.id == "file-test"
+    request = requests[0]
+    assert request.headers["Content-Type"].startswith("multipart/form-data")
+    body = request.read()
+    assert b'name="purpose"' in body
+    assert b"{}\n" in body
+
+
+def test_json_se_serializa_con_orjson():
+    http = OrjsonAsyncHttpxClient()
+    request = http.build_request("POST", "https://api.openai.com/v1/responses", json={"input": "hola", "n": 1})
+
+    assert request.headers["Content-Type"] == "application/json"
+    assert request.read() == b'{"input":"hola","n":1}'